@@ -1,14 +1,73 @@
 from __future__ import print_function as _
 from __future__ import absolute_import
+import importlib as _importlib
 import os as _os
 import sys as _sys
+import typing as _typing
 import json
 
 import dash as _dash
 
-from .component_factory._manhattan import ManhattanPlot
-from .component_factory._volcano import VolcanoPlot
-from .component_factory._clustergram import Clustergram
+# The component factories (e.g., Clustergram, ManhattanPlot) import numpy,
+# pandas, scipy and plotly; they are only imported when first used (PEP 562),
+# so that apps which only use the components start faster.
+_component_factories = {
+    'ManhattanPlot': '_manhattan',
+    'MultiManhattanPlot': '_manhattan',
+    'PreparedManhattanPlot': '_manhattan',
+    'manhattan_plot_range': '_manhattan',
+    'read_summary_stats': '_summary_stats',
+    'MultiVolcanoPlot': '_volcano',
+    'PreparedVolcanoPlot': '_volcano',
+    'VolcanoPlot': '_volcano',
+    'Clustergram': '_clustergram',
+    'clustergram_linkage': '_clustergram',
+    'clustergram_heatmap_tile': '_clustergram',
+    'update_clustergram_linkage': '_clustergram',
+    'LinkageCache': '_linkage_cache',
+    'DiskLinkageCache': '_linkage_cache',
+}
+
+
+if _typing.TYPE_CHECKING:
+    # the same names, for static analysis (e.g., pylint, IDEs and type
+    # checkers), which cannot follow __getattr__
+    from .component_factory._manhattan import (  # noqa: F401
+        ManhattanPlot, MultiManhattanPlot, PreparedManhattanPlot,
+        manhattan_plot_range
+    )
+    from .component_factory._summary_stats import (  # noqa: F401
+        read_summary_stats
+    )
+    from .component_factory._volcano import (  # noqa: F401
+        MultiVolcanoPlot, PreparedVolcanoPlot, VolcanoPlot
+    )
+    from .component_factory._clustergram import (  # noqa: F401
+        Clustergram, clustergram_linkage, clustergram_heatmap_tile,
+        update_clustergram_linkage
+    )
+    from .component_factory._linkage_cache import (  # noqa: F401
+        LinkageCache, DiskLinkageCache
+    )
+
+
+def __getattr__(name):
+    if name not in _component_factories:
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name)
+        )
+    module = _importlib.import_module(
+        '.component_factory.' + _component_factories[name], __name__
+    )
+    value = getattr(module, name)
+    # later lookups do not go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_component_factories))
+
 
 if not hasattr(_dash, '__plotly_dash') and not hasattr(_dash, 'development'):
     print('Dash was not successfully imported. '
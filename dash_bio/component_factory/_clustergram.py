@@ -1,15 +1,25 @@
 # -*- coding: utf-8 -*-
 
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import pandas as pd
-import scipy
 import scipy.cluster.hierarchy as sch
 import scipy.spatial as scs
-from sklearn.impute import SimpleImputer
 
 import plotly.graph_objects as go
 from plotly import subplots
-import plotly.figure_factory as ff
+
+from ._dendrogram import _dendrogram_traces
+from ._linkage import _condensed_append, _condensed_subset, _distances, _linkage
+from ._linkage_cache import _linkage_cache_key
+from ._preprocessing import _preprocess
+from .utils import _decode_typed_array, _encode_typed_array
+
+
+def _complete_linkage(x, **kwargs):
+    """Return the complete linkage matrix of the condensed distances `x`."""
+    return sch.linkage(x, "complete", **kwargs)
 
 
 # pylint: disable=assignment-from-no-return, no-self-use
@@ -26,7 +36,7 @@ def Clustergram(
     row_dist="euclidean",
     col_dist="euclidean",
     dist_fun=scs.distance.pdist,
-    link_fun=lambda x, **kwargs: sch.linkage(x, "complete", **kwargs),
+    link_fun=_complete_linkage,
     color_threshold=None,
     optimal_leaf_order=False,
     color_map=None,
@@ -45,6 +55,15 @@ def Clustergram(
     plot_bg_color="rgba(0,0,0,0)",
     height=500,
     width=500,
+    linkage_cache=None,
+    row_linkage=None,
+    col_linkage=None,
+    row_bin_size=None,
+    n_jobs=1,
+    executor=None,
+    heatmap_aggregation=None,
+    typed_arrays=False,
+    dtype="float64",
 ):
     """Return a Dash Bio Clustergram object.
 
@@ -160,6 +179,66 @@ Keyword arguments:
     color of the subplots on the graph.
 - height (number; default 500): The height of the graph, in px.
 - width (number; default 500): The width of the graph, in px.
+- linkage_cache (LinkageCache | DiskLinkageCache; optional): A cache in
+    which the linkage matrices and leaf orders are stored, keyed by a
+    fingerprint of the data and of the clustering parameters (`cluster`,
+    `row_dist`, `col_dist`, `dist_fun`, `link_fun` and
+    `optimal_leaf_order`). When the same data is clustered again with the
+    same parameters, e.g., in a callback that only changes `color_map`
+    or `height`, the pairwise distances and the linkage are not
+    recomputed. The clusterings whose `dist_fun` or `link_fun` cannot be
+    fingerprinted (e.g., callable objects, or functions whose closure
+    or the globals that they read hold other objects than numbers,
+    strings, arrays, containers, modules, classes and functions) are not
+    cached. The functions called by `dist_fun` or `link_fun` are
+    identified by their name, so a clustering that depends on a global
+    read by such a function must use its own cache (or none).
+- row_linkage (2D array-like; optional): A precomputed linkage matrix
+    for the rows, in the format returned by
+    scipy.cluster.hierarchy.linkage (see `clustergram_linkage`). When it
+    is specified, the pairwise distances and the linkage are not
+    computed for the rows.
+- col_linkage (2D array-like; optional): A precomputed linkage matrix
+    for the columns (see `row_linkage`).
+- row_bin_size (number; optional): Cluster the rows in bounded memory,
+    for matrices with too many rows for the full pairwise distance
+    matrix (n * (n - 1) / 2 float64 values, i.e., about 10 GB for 50,000
+    rows) to fit in memory. The rows are first split into bins of at
+    most `row_bin_size` rows with k-means; each bin is clustered exactly
+    (with float32 distances, computed in blocks, when `dist_fun` is the
+    default), the bins are clustered by their centroids, and the trees
+    are joined into a single dendrogram. The memory used for distances
+    is then about 10 * max(row_bin_size, n / row_bin_size) ** 2 bytes,
+    e.g., 40 MB with 50,000 rows and a bin size of 2000. The clustering
+    is approximate: rows in different bins are only joined through
+    their bins. The figure and the other arguments are unchanged.
+- n_jobs (number; default 1): The number of threads used for
+    clustering. With more than one, the rows and the columns are
+    clustered at the same time (when `cluster` is 'all'), and, with the
+    default `dist_fun`, the pairwise distances are computed in parallel
+    blocks of rows.
+- executor (concurrent.futures.Executor; optional): The executor in
+    which the row and column clusterings are run, e.g., a
+    ProcessPoolExecutor for linkage functions that hold the GIL. In that
+    case, `dist_fun` and `link_fun` must be picklable (i.e., not
+    lambdas).
+- heatmap_aggregation (string; optional): For matrices with more rows
+    or columns than the graph has pixels, the method used to aggregate
+    blocks of neighboring cells of the heatmap: 'mean' or 'max'. The
+    heatmap then has at most `height` x `width` cells, and the full
+    resolution data are returned under the key 'heat_data' of the
+    computed traces; use them with `clustergram_heatmap_tile` to show
+    more details when the user zooms in.
+- typed_arrays (bool; default False): Whether or not to encode the
+    heatmap values and the dendrogram coordinates as base64 typed arrays
+    of float32 values (with the heatmap axes in float64) instead of
+    lists of numbers. This makes the figure several times smaller in
+    JSON and faster to serialize. It requires plotly >= 6 (and, in the
+    browser, plotly.js >= 2.28, i.e., dash >= 2.15).
+- dtype (string; default 'float64'): The dtype, 'float32' or 'float64',
+    of the preprocessed data. Imputation, log transform and
+    standardization are all done in place on a single array of this
+    dtype; 'float32' halves the memory used for large matrices.
 
     """
     if color_threshold is None:
@@ -190,6 +269,296 @@ Keyword arguments:
     return tuple(return_values)
 
 
+def clustergram_linkage(data, return_distances=False, **kwargs):
+    """Return the linkage matrices that a Dash Bio Clustergram computes.
+
+The data are preprocessed and clustered exactly as they would be by
+`Clustergram`, but no figure is built. The returned matrices can be
+passed back with the `row_linkage` and `col_linkage` arguments, e.g.,
+after computing them once in a worker process, so that the Dash
+callbacks only assemble the figure:
+
+    linkage = clustergram_linkage(data, cluster='all')
+    fig = Clustergram(data, cluster='all', **linkage)
+
+Keyword arguments:
+
+- data (2D array-like; required): Matrix or table of observations (dropping
+    columns of non-numeric dtype).
+- return_distances (bool; default False): Whether or not to also return
+    the condensed pairwise distances, which `update_clustergram_linkage`
+    uses to update the clustering when rows are filtered or added. This
+    cannot be combined with `row_bin_size`.
+- Additional keys (misc.): The preprocessing and clustering arguments of
+    `Clustergram` (e.g., `standardize`, `cluster`, `row_dist`, `col_dist`,
+    `dist_fun`, `link_fun`, `optimal_leaf_order`, `log_transform`,
+    `imputer_parameters` and `linkage_cache`). Arguments that only affect
+    the figure are ignored.
+
+Returns:
+
+- dict: The linkage matrices under the keys 'row_linkage' and
+    'col_linkage'; the value is None for a dimension that is not
+    clustered.
+- dict: If `return_distances` is True, the condensed distances under
+    the keys 'row' and 'col'.
+    """
+    # allow referring to protected member
+    # pylint: disable=W0212
+    cg = _Clustergram(data, **kwargs)
+    if not return_distances:
+        clusters = cg._get_clusters()
+        return {
+            "row_linkage": clusters.get("row_linkage"),
+            "col_linkage": clusters.get("col_linkage"),
+        }
+
+    if cg._row_bin_size is not None:
+        raise ValueError("return_distances cannot be combined with row_bin_size")
+    distances = cg._get_distances()
+    linkage = {
+        "%s_linkage" % dim: None
+        if distances[dim] is None
+        else cg._link_fun(distances[dim], optimal_ordering=cg._optimal_leaf_order)
+        for dim in ["row", "col"]
+    }
+    return linkage, distances
+
+
+def update_clustergram_linkage(
+    linkage,
+    distances,
+    data,
+    row_mask=None,
+    appended_rows=None,
+    recluster_columns=False,
+    **kwargs
+):
+    """Update a Clustergram clustering after rows are filtered or added.
+
+Instead of clustering the new matrix from scratch, the pairwise
+distances between the rows that are kept are sliced from the previous
+ones, and only the distances to the appended rows are computed. The
+column clustering is reused as it is, unless `recluster_columns` is
+True. Use the result like the one of `clustergram_linkage`:
+
+    linkage, distances = clustergram_linkage(data, return_distances=True)
+    linkage, distances = update_clustergram_linkage(
+        linkage, distances, data, row_mask=selected_genes
+    )
+    fig = Clustergram(data[selected_genes], **linkage)
+
+The reuse is only exact when the preprocessing of a row does not depend
+on the other rows; with `standardize='column'`, or with imputation along
+columns (`imputer_parameters` with 'axis' 1), or with a custom
+`dist_fun` and appended rows, the new matrix is clustered from scratch.
+
+Keyword arguments:
+
+- linkage (dict; required): The linkage matrices of `data`, as returned
+    by `clustergram_linkage`.
+- distances (dict; required): The condensed distances of `data`, as
+    returned by `clustergram_linkage` with `return_distances`.
+- data (2D array-like; required): The matrix or table of observations
+    that the linkage was computed from.
+- row_mask (array-like; optional): The rows of `data` to keep, as a
+    boolean mask or as an array of indices. By default, all rows are
+    kept.
+- appended_rows (2D array-like; optional): Rows that are appended after
+    the rows that are kept.
+- recluster_columns (bool; default False): Whether or not to recompute
+    the column clustering for the new matrix.
+- Additional keys (misc.): The preprocessing and clustering arguments of
+    `Clustergram`, which must be the ones used for `linkage`.
+
+Returns:
+
+- dict: The linkage matrices of the new matrix, i.e., the kept rows of
+    `data` followed by `appended_rows`.
+- dict: The condensed distances of the new matrix; the column distances
+    are None if the column clustering was reused.
+    """
+    # allow referring to protected member
+    # pylint: disable=W0212
+    if isinstance(data, pd.DataFrame):
+        data = data.select_dtypes("number").values
+    data = np.asarray(data)
+    n = data.shape[0]
+    if row_mask is None:
+        keep = np.arange(n)
+    else:
+        row_mask = np.asarray(row_mask)
+        keep = np.flatnonzero(row_mask) if row_mask.dtype == bool else row_mask
+    new_data = data[keep]
+    if appended_rows is not None:
+        if isinstance(appended_rows, pd.DataFrame):
+            appended_rows = appended_rows.select_dtypes("number").values
+        new_data = np.vstack([new_data, appended_rows])
+
+    cg = _Clustergram(new_data, **kwargs)
+    if (
+        distances.get("row") is None
+        or not cg._row_local_preprocessing()
+        or (appended_rows is not None and cg._dist_fun is not scs.distance.pdist)
+    ):
+        return clustergram_linkage(new_data, return_distances=True, **kwargs)
+
+    new_distances = {"row": _condensed_subset(distances["row"], n, keep), "col": None}
+    if appended_rows is not None:
+        new_distances["row"] = _condensed_append(
+            new_distances["row"],
+            cg._data[:len(keep)],
+            cg._data[len(keep):],
+            cg._row_dist,
+        )
+    new_linkage = {
+        "row_linkage": cg._link_fun(
+            new_distances["row"], optimal_ordering=cg._optimal_leaf_order
+        ),
+        "col_linkage": linkage.get("col_linkage"),
+    }
+
+    if new_linkage["col_linkage"] is not None and recluster_columns:
+        new_distances["col"] = cg._get_distances()["col"]
+        new_linkage["col_linkage"] = cg._link_fun(
+            new_distances["col"], optimal_ordering=cg._optimal_leaf_order
+        )
+
+    return new_linkage, new_distances
+
+
+def clustergram_heatmap_tile(
+    computed_traces,
+    relayout_data=None,
+    height=500,
+    width=500,
+    heatmap_aggregation="mean",
+):
+    """Return the heatmap of a Clustergram for the range the user zoomed into.
+
+The cells in view are aggregated to at most one per pixel, so that a
+zoomed-out view stays small, and zooming into a range of rows/columns of
+the dendrogram order shows them at full resolution. Use it in a callback
+on the `relayoutData` of the graph:
+
+    @app.callback(Output('graph', 'figure'), Input('graph', 'relayoutData'),
+                  State('graph', 'figure'))
+    def zoom(relayout_data, figure):
+        tile = clustergram_heatmap_tile(computed_traces, relayout_data)
+        for trace in figure['data']:
+            if trace['type'] == 'heatmap':
+                trace.update(tile)
+        return figure
+
+Keyword arguments:
+
+- computed_traces (dict; required): The computed traces returned by a
+    Clustergram with `heatmap_aggregation` specified (they must contain
+    the full resolution data under the key 'heat_data', so they should
+    be kept on the server).
+- relayout_data (dict; optional): The `relayoutData` of the graph; the
+    range of the heatmap axes ('xaxis5' and 'yaxis5') is used. Without
+    a range, the whole heatmap is returned.
+- height (number; default 500): The height of the heatmap, in px.
+- width (number; default 500): The width of the heatmap, in px.
+- heatmap_aggregation (string; default 'mean'): The method used to
+    aggregate blocks of cells: 'mean' or 'max'.
+
+Returns:
+
+- dict: The 'x', 'y' and 'z' properties of the heatmap trace.
+    """
+    heat_data = computed_traces["heat_data"]
+    if not isinstance(heat_data, np.ndarray):
+        heat_data = _decode_typed_array(heat_data)
+    if relayout_data is None:
+        relayout_data = {}
+
+    spans = []
+    for axis, n in [("yaxis5", heat_data.shape[0]), ("xaxis5", heat_data.shape[1])]:
+        if "%s.range" % axis in relayout_data:
+            r0, r1 = relayout_data["%s.range" % axis]
+        elif "%s.range[0]" % axis in relayout_data:
+            r0 = relayout_data["%s.range[0]" % axis]
+            r1 = relayout_data["%s.range[1]" % axis]
+        else:
+            spans.append((0, n))
+            continue
+        # the cells are centered on 5, 15, 25, ...
+        lo, hi = sorted([r0, r1])
+        start = min(max(int(np.floor(lo / 10.)), 0), n - 1)
+        stop = max(min(int(np.ceil(hi / 10.)), n), start + 1)
+        spans.append((start, stop))
+
+    x, y, z = _aggregate_heatmap(
+        heat_data, spans[0], spans[1], height, width, heatmap_aggregation
+    )
+    return dict(x=x, y=y, z=z)
+
+
+def _aggregate_heatmap(heat_data, row_span, col_span, max_rows, max_cols, how):
+    """Aggregate a range of the heatmap into at most max_rows x max_cols
+    blocks of neighboring cells.
+
+    Parameters:
+    - heat_data (ndarray): The full resolution heatmap.
+    - row_span (tuple): The range of rows (start, stop) to aggregate.
+    - col_span (tuple): The range of columns (start, stop) to aggregate.
+    - max_rows (number): The maximum number of rows of blocks.
+    - max_cols (number): The maximum number of columns of blocks.
+    - how (string): 'mean' or 'max'; NaN values are ignored.
+
+    Returns:
+    - tuple: The x and y coordinates of the centers of the blocks (on
+    the scale of the dendrogram leaves), and the aggregated values.
+    """
+    z = heat_data[row_span[0]:row_span[1], col_span[0]:col_span[1]]
+    centers = []
+    for axis, (start, stop), max_blocks in [
+        (0, row_span, max_rows),
+        (1, col_span, max_cols),
+    ]:
+        n = stop - start
+        n_blocks = max(1, min(n, int(max_blocks)))
+        edges = np.linspace(0, n, n_blocks + 1).astype(int)
+        if n_blocks < n:
+            missing = np.isnan(z)
+            if how == "max":
+                z = np.fmax.reduceat(z, edges[:-1], axis=axis)
+            else:
+                sums = np.add.reduceat(np.where(missing, 0, z), edges[:-1], axis=axis)
+                counts = np.add.reduceat(~missing, edges[:-1], axis=axis)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    z = sums / counts
+        # the leaves are at 5, 15, 25, ...
+        centers.append(10 * (start + (edges[:-1] + edges[1:] - 1) / 2.) + 5)
+    return centers[1], centers[0], z
+
+
+def _check_linkage(Z, n, name):
+    """Return a precomputed linkage matrix as an array of floats.
+
+    Parameters:
+    - Z (2D array-like): The linkage matrix, or None.
+    - n (number): The number of observations that were clustered.
+    - name (string): The name of the argument, for error messages.
+
+    Returns:
+    - ndarray: The linkage matrix, or None.
+    """
+    if Z is None:
+        return None
+    # during serialization (e.g., in a dcc.Store), the arrays get
+    # turned into lists
+    Z = np.asarray(Z, dtype=float)
+    if Z.shape != (max(n - 1, 0), 4):
+        raise ValueError(
+            "%s should be a linkage matrix of shape (%d, 4), got %s"
+            % (name, n - 1, Z.shape)
+        )
+    return Z
+
+
 class _Clustergram:
     """A Dash Bio Clustergram class.
 
@@ -209,7 +578,7 @@ Methods:
         row_dist="euclidean",
         col_dist="euclidean",
         dist_fun=scs.distance.pdist,
-        link_fun=lambda x, **kwargs: sch.linkage(x, "complete", **kwargs),
+        link_fun=_complete_linkage,
         color_threshold=None,
         optimal_leaf_order=False,
         color_map=None,
@@ -228,6 +597,15 @@ Methods:
         plot_bg_color="rgba(0,0,0,0)",
         height=500,
         width=500,
+        linkage_cache=None,
+        row_linkage=None,
+        col_linkage=None,
+        row_bin_size=None,
+        n_jobs=1,
+        executor=None,
+        heatmap_aggregation=None,
+        typed_arrays=False,
+        dtype="float64",
     ):
         """Construct a Dash Bio Clustergram object.
 
@@ -291,6 +669,19 @@ Methods:
         self._plot_bg_color = plot_bg_color
         self._height = height
         self._width = width
+        self._linkage_cache = linkage_cache
+        self._row_bin_size = row_bin_size
+        self._n_jobs = n_jobs
+        self._standardize = standardize
+        if heatmap_aggregation not in [None, "mean", "max"]:
+            raise ValueError(
+                "heatmap_aggregation should be None, 'mean' or 'max'"
+            )
+        self._heatmap_aggregation = heatmap_aggregation
+        self._typed_arrays = typed_arrays
+        self._executor = executor
+        self._row_linkage = _check_linkage(row_linkage, data.shape[0], "row_linkage")
+        self._col_linkage = _check_linkage(col_linkage, data.shape[1], "col_linkage")
 
         # convert line width to list if necessary
         if isinstance(line_width, list):
@@ -324,24 +715,21 @@ Methods:
             # numpy NaN values are not serializable and turn into
             # 'None' by the time they get here; passing a string
             # means that it can be converted in the clustergram
-            # component itself
-            if self._imputer_parameters["missing_values"].lower() == "nan":
-                self._imputer_parameters.update(missing_values=np.nan)
-
-            imp = SimpleImputer(
-                missing_values=self._imputer_parameters["missing_values"],
-                strategy=self._imputer_parameters["strategy"],
-            )
-
-            if self._imputer_parameters["axis"] == 0:
-                self._data = imp.fit_transform(self._data.T).T
-            else:
-                self._data = imp.fit_transform(self._data)
+            # component itself (the parameters are copied, so that they
+            # can be used again)
+            missing_values = self._imputer_parameters["missing_values"]
+            if isinstance(missing_values, str) and missing_values.lower() == "nan":
+                self._imputer_parameters = dict(
+                    self._imputer_parameters, missing_values=np.nan
+                )
 
-        if log_transform:
-            self._data = np.log2(self._data)
-        if standardize in ["row", "column"]:
-            self._data = self._scale(standardize)
+        self._data = _preprocess(
+            self._data,
+            dtype=dtype,
+            imputer_parameters=self._imputer_parameters,
+            log_transform=log_transform,
+            standardize=standardize,
+        )
 
     def figure(self, computed_traces=None):
         """Return a figure object compatible with plotly.graph_objects.
@@ -351,7 +739,7 @@ Methods:
     - computed_traces (dict; optional): The dendrogram traces from another
         (precomputed) Clustergram component.
         """
-        dt, heatmap = None, None
+        dt, heatmap, heat_data = None, None, None
 
         if computed_traces is None:
             (
@@ -365,6 +753,7 @@ Methods:
             # traces (as well as the row and column labels)
             dt = computed_traces["dendro_traces"]
             heatmap = computed_traces["heatmap"]
+            heat_data = computed_traces.get("heat_data")
             self._row_ids = computed_traces["row_ids"]
             self._column_ids = computed_traces["column_ids"]
 
@@ -399,57 +788,20 @@ Methods:
 
         fig["layout"].update(hovermode="closest")
 
-        # get the tick values; these will be at the leaves of the
-        # dendrogram
-
-        tickvals_col = []
-        tickvals_row = []
-
-        # for column dendrogram, leaves are at bottom (y=0)
-        for i in range(len(dt["col"])):
-            xs = dt["col"][i]["x"]
-            ys = dt["col"][i]["y"]
-
-            # during serialization (e.g., in a dcc.Store, the NaN
-            # values become None and the arrays get turned into lists;
-            # they must be converted back
-            if isinstance(xs, list):
-                xs = np.array(xs, dtype=np.float)
-                dt["col"][i].update(x=xs)
-            if isinstance(ys, list):
-                ys = np.array(ys, dtype=np.float)
-                dt["col"][i].update(y=ys)
-            tickvals_col += [
-                xs.flatten()[j]
-                for j in range(len(xs.flatten()))
-                if ys.flatten()[j] == 0.0 and xs.flatten()[j] % 10 == 5
-            ]
-        tickvals_col = list(set(tickvals_col))
-
-        # for row dendrogram, leaves are at right(x=0, since we
-        # horizontally flipped it)
-        for i in range(len(dt["row"])):
-            xs = dt["row"][i]["x"]
-            ys = dt["row"][i]["y"]
-
-            if isinstance(xs, list):
-                xs = np.array(xs, dtype=np.float)
-                dt["row"][i].update(x=xs)
-            if isinstance(ys, list):
-                ys = np.array(ys, dtype=np.float)
-                dt["row"][i].update(y=ys)
-
-            tickvals_row += [
-                ys.flatten()[j]
-                for j in range(len(ys.flatten()))
-                if xs.flatten()[j] == 0.0 and ys.flatten()[j] % 10 == 5
-            ]
-
-        tickvals_row = list(set(tickvals_row))
-
-        # sort so they are in the right order (lowest to highest)
-        tickvals_col.sort()
-        tickvals_row.sort()
+        # get the tick values; these are at the leaves of the
+        # dendrogram, i.e., at 5, 15, 25, ...
+        tickvals_col = [10 * i + 5 for i in range(len(self._column_ids))]
+        tickvals_row = [10 * i + 5 for i in range(len(self._row_ids))]
+
+        # during serialization (e.g., in a dcc.Store), the NaN values
+        # become None and the arrays get turned into lists (or typed
+        # arrays); they must be converted back
+        for dim in ["col", "row"]:
+            for trace in dt[dim]:
+                if not isinstance(trace["x"], np.ndarray):
+                    trace.update(x=_decode_typed_array(trace["x"]))
+                if not isinstance(trace["y"], np.ndarray):
+                    trace.update(y=_decode_typed_array(trace["y"]))
 
         # update axis settings for dendrograms and heatmap
         axes = [
@@ -498,8 +850,8 @@ Methods:
         col_dendro_traces_min_y = 0
         col_dendro_traces_max_y = 1
         if len(col_dendro_traces_y):
-            col_dendro_traces_min_y = np.concatenate(col_dendro_traces_y).min()
-            col_dendro_traces_max_y = np.concatenate(col_dendro_traces_y).max()
+            col_dendro_traces_min_y = np.nanmin(np.concatenate(col_dendro_traces_y))
+            col_dendro_traces_max_y = np.nanmax(np.concatenate(col_dendro_traces_y))
 
         # ensure that everything is aligned properly
         # with the heatmap
@@ -508,9 +860,6 @@ Methods:
         xaxis2 = fig["layout"]["xaxis2"]  # pylint: disable=invalid-sequence-index
         xaxis2.update(scaleanchor="x5")
 
-        if len(tickvals_col) == 0:
-            tickvals_col = [10 * i + 5 for i in range(len(self._column_ids))]
-
         # add in all of the labels
         fig["layout"]["xaxis5"].update(  # pylint: disable=invalid-sequence-index
             tickmode="array",
@@ -525,9 +874,6 @@ Methods:
             # the graph cuts off and must be scaled manually
         )
 
-        if len(tickvals_row) == 0:
-            tickvals_row = [10 * i + 5 for i in range(len(self._row_ids))]
-
         fig["layout"]["yaxis5"].update(  # pylint: disable=invalid-sequence-index
             tickmode="array",
             tickvals=tickvals_row,
@@ -548,14 +894,29 @@ Methods:
             # heatmap
             heat_data = self._data
 
-            # symmetrize the heatmap about zero, if necessary
+            # symmetrize the heatmap about zero, if necessary; the
+            # clustered data is a copy, so it can be modified in place
             if self._center_values:
-                heat_data = np.subtract(heat_data, np.mean(heat_data))
+                heat_data -= np.mean(heat_data)
+
+            heatmap_x, heatmap_y, heatmap_z = tickvals_col, tickvals_row, heat_data
+            if self._heatmap_aggregation is not None:
+                # at most one cell per pixel
+                heatmap_x, heatmap_y, heatmap_z = _aggregate_heatmap(
+                    heat_data,
+                    (0, len(self._row_ids)),
+                    (0, len(self._column_ids)),
+                    self._height,
+                    self._width,
+                    self._heatmap_aggregation,
+                )
+            else:
+                heat_data = None
 
             heatmap = go.Heatmap(
-                x=tickvals_col,
-                y=tickvals_row,
-                z=heat_data,
+                x=heatmap_x,
+                y=heatmap_y,
+                z=heatmap_z,
                 colorscale=self._color_map,
                 # TODO: This should be based on the text width of the labels, or
                 # at least passable by the user, so they can adjust it
@@ -695,49 +1056,156 @@ Methods:
             "row_ids": self._row_ids,
             "column_ids": self._column_ids,
         }
+        if heat_data is not None:
+            computed_traces["heat_data"] = heat_data
+
+        if self._typed_arrays:
+            for i, trace in enumerate(fig.data):
+                if trace.type == "heatmap":
+                    trace.update(
+                        x=_encode_typed_array(trace.x, "f8"),
+                        y=_encode_typed_array(trace.y, "f8"),
+                        z=_encode_typed_array(_decode_typed_array(trace.z)),
+                    )
+                elif i in cluster_curve_numbers:
+                    trace.update(
+                        x=_encode_typed_array(trace.x),
+                        y=_encode_typed_array(trace.y),
+                    )
 
         return (fig, computed_traces, cluster_curve_numbers)
 
-    def _scale(self, dim):
-        """Return standardized data based on user parameters.
+    def _get_clusters(self):
+        """Cluster the data according to the specified dimensions.
 
-        Parameters:
-        - dim (string): The dimension, row or column, to standardize across.
+        Precomputed linkage matrices are used as they are. Otherwise, if
+        a linkage cache was specified, the clustering is looked up in
+        (and, if missing, stored into) the cache.
 
         Returns:
-        - ndarray: An array containing the standardized data.
+        - dict: The linkage matrices ('col_linkage', 'row_linkage') and the
+        leaf orders ('col_leaves', 'row_leaves') for the clustered
+        dimensions.
         """
 
-        std = np.zeros(self._data.shape)
-
-        if dim == "row":
-            std = scipy.stats.zscore(self._data, axis=1)
-        elif dim == "column":
-            std = scipy.stats.zscore(self._data, axis=0)
-
-        return std
-
-    def _get_clusters(self):
-        """Cluster the data according to the specified dimensions.
+        clusters = {}
+        if self._cluster in ["col", "all"] and self._col_linkage is not None:
+            clusters["col_linkage"] = self._col_linkage
+            clusters["col_leaves"] = sch.leaves_list(self._col_linkage)
+        if self._cluster in ["row", "all"] and self._row_linkage is not None:
+            clusters["row_linkage"] = self._row_linkage
+            clusters["row_leaves"] = sch.leaves_list(self._row_linkage)
+
+        cluster_col = self._cluster in ["col", "all"] and "col_linkage" not in clusters
+        cluster_row = self._cluster in ["row", "all"] and "row_linkage" not in clusters
+        if not (cluster_col or cluster_row):
+            return clusters
+
+        key = None
+        if self._linkage_cache is not None:
+            key = _linkage_cache_key(
+                self._data,
+                cluster=self._cluster,
+                row_dist=self._row_dist,
+                col_dist=self._col_dist,
+                dist_fun=self._dist_fun,
+                link_fun=self._link_fun,
+                optimal_leaf_order=self._optimal_leaf_order,
+                row_bin_size=self._row_bin_size,
+            )
+        if key is not None:
+            cached = self._linkage_cache.get(key)
+            if cached is not None:
+                return dict(cached, **clusters)
+
+        jobs = {}
+        if cluster_col:
+            jobs["col"] = (np.transpose(self._data), self._col_dist, None)
+        # the bounded-memory mode only applies to rows
+        if cluster_row:
+            jobs["row"] = (self._data, self._row_dist, self._row_bin_size)
+
+        # the row and column clusterings are independent, so they can run
+        # at the same time
+        executor = self._executor
+        own_executor = executor is None and self._n_jobs > 1 and len(jobs) > 1
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=len(jobs))
+        try:
+            if executor is not None:
+                futures = {
+                    dim: executor.submit(
+                        _linkage,
+                        X,
+                        metric,
+                        self._dist_fun,
+                        self._link_fun,
+                        self._optimal_leaf_order,
+                        bin_size,
+                        self._n_jobs,
+                    )
+                    for dim, (X, metric, bin_size) in jobs.items()
+                }
+                linkages = {dim: f.result() for dim, f in futures.items()}
+            else:
+                linkages = {
+                    dim: _linkage(
+                        X,
+                        metric,
+                        self._dist_fun,
+                        self._link_fun,
+                        self._optimal_leaf_order,
+                        bin_size,
+                        self._n_jobs,
+                    )
+                    for dim, (X, metric, bin_size) in jobs.items()
+                }
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+        computed = {}
+        for dim, Z in linkages.items():
+            computed["%s_linkage" % dim] = Z
+            computed["%s_leaves" % dim] = sch.leaves_list(Z)
+
+        # only cache complete clusterings, so that a cache hit never
+        # lacks a dimension
+        if key is not None and not clusters:
+            self._linkage_cache.set(key, computed)
+
+        return dict(computed, **clusters)
+
+    def _get_distances(self):
+        """Compute the condensed pairwise distances of the clustered
+        dimensions.
 
         Returns:
-        - tuple: The linkage matrices for the columns and/or rows.
+        - dict: The condensed distances between the rows ('row') and
+        between the columns ('col'); None for a dimension that is not
+        clustered.
         """
-
-        Zcol = None
-        Zrow = None
-
-        # cluster along columns
+        distances = {"row": None, "col": None}
         if self._cluster in ["col", "all"]:
-            tmp = np.transpose(self._data)
-            dcol = self._dist_fun(tmp, metric=self._col_dist)
-            Zcol = self._link_fun(dcol, optimal_ordering=self._optimal_leaf_order)
-        # cluster along rows only if 'all' is selected
+            distances["col"] = _distances(
+                np.transpose(self._data), self._col_dist, self._dist_fun, self._n_jobs
+            )
         if self._cluster in ["row", "all"]:
-            drow = self._dist_fun(self._data, metric=self._row_dist)
-            Zrow = self._link_fun(drow, optimal_ordering=self._optimal_leaf_order)
-
-        return (Zcol, Zrow)
+            distances["row"] = _distances(
+                self._data, self._row_dist, self._dist_fun, self._n_jobs
+            )
+        return distances
+
+    def _row_local_preprocessing(self):
+        """Return whether the preprocessing of each row only depends on
+        the row itself, i.e., whether it is unchanged when other rows are
+        filtered or added."""
+        if self._standardize == "column":
+            return False
+        if self._imputer_parameters is not None and \
+                self._imputer_parameters["axis"] != 0:
+            return False
+        return True
 
     def _compute_clustered_data(self):
         """Get the traces that need to be plotted for the row and column
@@ -759,58 +1227,36 @@ Methods:
         # initialize return dict
         trace_list = {"col": [], "row": []}
 
-        clustered_column_ids = self._column_ids
-        clustered_row_ids = self._row_ids
+        rl_indices = list(range(len(self._row_ids)))
+        cl_indices = list(range(len(self._column_ids)))
 
-        # cluster the data and calculate dendrogram
+        # cluster the data (or get the clustering from the cache)
+        clusters = self._get_clusters()
 
-        # allow referring to protected member
-        # pylint: disable=W0212
-        # columns
-        if self._cluster in ["col", "all"]:
-            cols_dendro = ff._dendrogram._Dendrogram(
-                np.transpose(self._data),
+        # calculate the dendrograms from the linkage matrices
+        if "col_linkage" in clusters:
+            trace_list["col"] = _dendrogram_traces(
+                clusters["col_linkage"],
                 orientation="bottom",
-                labels=self._column_ids,
-                # TODO: How does colormap work?
-                # colorscale=self._color_map["cols"],
-                distfun=lambda X: self._dist_fun(X, metric=self._col_dist),
-                linkagefun=lambda d: self._link_fun(
-                    d, optimal_ordering=self._optimal_leaf_order
-                ),
                 color_threshold=self._color_threshold["col"],
             )
-            clustered_column_ids = cols_dendro.labels
-            trace_list["col"] = cols_dendro.data
+            cl_indices = list(clusters["col_leaves"])
 
-        # rows
-        if self._cluster in ["row", "all"]:
-            rows_dendro = ff._dendrogram._Dendrogram(
-                self._data,
+        if "row_linkage" in clusters:
+            trace_list["row"] = _dendrogram_traces(
+                clusters["row_linkage"],
                 orientation="right",
-                labels=self._row_ids,
-                # TODO: How does colormap work?
-                # colorscale=self._color_map,
-                distfun=lambda X: self._dist_fun(X, metric=self._row_dist),
-                linkagefun=lambda d: self._link_fun(
-                    d, optimal_ordering=self._optimal_leaf_order
-                ),
                 color_threshold=self._color_threshold["row"],
             )
-            clustered_row_ids = rows_dendro.labels
-            trace_list["row"] = rows_dendro.data
-        # pylint: enable=W0212
-
-        # now, we need to rearrange the data array to fit the labels
+            rl_indices = list(clusters["row_leaves"])
 
-        # first get reordered indices
-        rl_indices = [self._row_ids.index(r) for r in clustered_row_ids]
-        cl_indices = [self._column_ids.index(c) for c in clustered_column_ids]
+        # now, we need to rearrange the data array and the labels to
+        # fit the leaf orders
+        clustered_row_ids = [self._row_ids[r] for r in rl_indices]
+        clustered_column_ids = [self._column_ids[c] for c in cl_indices]
 
-        # modify the data here; first shuffle rows,
-        # then transpose and shuffle columns,
-        # then transpose again
-        clustered_data = self._data[rl_indices].T[cl_indices].T
+        # modify the data here; shuffle the rows and the columns at once
+        clustered_data = self._data[np.ix_(rl_indices, cl_indices)]
 
         return trace_list, clustered_data, clustered_row_ids, clustered_column_ids
 
@@ -834,19 +1280,19 @@ Methods:
 
         if len(rdt) > 0:
             # first, find background trace: (max 'x')
-            rdt.sort(key=lambda t: -1 * max(list(t["x"])))
+            rdt.sort(key=lambda t: -1 * np.nanmax(t["x"]))
             tmp_rdt.append(rdt[0])
             # then, sort top-to-bottom
             r = rdt[1:]
-            r.sort(key=lambda t: -1 * min(list(t["y"])))
+            r.sort(key=lambda t: -1 * np.nanmin(t["y"]))
             tmp_rdt += r
         if len(cdt) > 0:
             # background trace has max 'y'
-            cdt.sort(key=lambda t: -1 * max(list(t["y"])))
+            cdt.sort(key=lambda t: -1 * np.nanmax(t["y"]))
             tmp_cdt.append(cdt[0])
             # sort left to right
             c = cdt[1:]
-            c.sort(key=lambda t: min(list(t["x"])))
+            c.sort(key=lambda t: np.nanmin(t["x"]))
             tmp_cdt += c
 
         return (tmp_rdt, tmp_cdt)
@@ -878,8 +1324,8 @@ Methods:
             if rgm["group"] >= len(row_clusters):
                 continue
             # get upper and lower bounds of group
-            ymin = min(row_clusters[rgm["group"]]["y"])
-            ymax = max(row_clusters[rgm["group"]]["y"])
+            ymin = float(np.nanmin(row_clusters[rgm["group"]]["y"]))
+            ymax = float(np.nanmax(row_clusters[rgm["group"]]["y"]))
             trace = go.Scatter(
                 x=[0, 0],
                 y=[ymin, ymax],
@@ -908,8 +1354,8 @@ Methods:
             if cgm["group"] >= len(col_clusters):
                 continue
             # get leftmost and rightmost bounds of group
-            xmin = min(col_clusters[cgm["group"]]["x"])
-            xmax = max(col_clusters[cgm["group"]]["x"])
+            xmin = float(np.nanmin(col_clusters[cgm["group"]]["x"]))
+            xmax = float(np.nanmax(col_clusters[cgm["group"]]["x"]))
             trace = go.Scatter(
                 x=[xmin, xmax],
                 y=[0, 0],
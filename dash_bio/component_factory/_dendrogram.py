@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import scipy.cluster.hierarchy as sch
+
+# scipy.cluster.hierarchy.dendrogram colors the links above the color
+# threshold with 'C0' and cycles through 'C1', ..., 'C9' for the clusters
+# below it; these are the colors that plotly.figure_factory maps them to
+ABOVE_THRESHOLD_COLOR = "rgb(0,116,217)"
+LINK_COLORS = [
+    "rgb(61,153,112)",  # C1
+    "rgb(255,65,54)",  # C2
+    "rgb(35,205,205)",  # C3
+    "rgb(133,20,75)",  # C4
+    "rgb(255,220,0)",  # C5
+    "rgb(40,35,35)",  # C6
+    "rgb(61,153,112)",  # C7
+    "rgb(255,65,54)",  # C8
+    "rgb(35,205,205)",  # C9
+]
+
+
+def _dendrogram_traces(Z, orientation="bottom", color_threshold=None):
+    """Return the traces that draw the dendrogram of a linkage matrix.
+
+    The coordinates are the ones of scipy.cluster.hierarchy.dendrogram:
+    the leaves are at 5, 15, 25, ... along the leaf axis, and each link is
+    drawn as a U shape from the heights of its children up to its own
+    height. Instead of one trace per link, the links are grouped by color
+    into one trace per cluster, in which consecutive links are separated
+    by NaN values; the links above the color threshold make up the first
+    (background) trace.
+
+    Parameters:
+    - Z (ndarray): The linkage matrix.
+    - orientation (string; default 'bottom'): The side of the plot on
+        which the leaves are: 'bottom', 'top', 'left' or 'right'.
+    - color_threshold (number; optional): The links lower than this
+        value are colored by cluster. If it is None, 0.7 times the height
+        of the highest link is used; if it is 0 or less, all of the links
+        have the background color.
+
+    Returns:
+    - list[dict]: The dendrogram traces.
+    """
+    Z = np.asarray(Z, dtype=float)
+    n = Z.shape[0] + 1
+    if n < 2:
+        return []
+
+    children = Z[:, :2].astype(np.intp)
+    heights = Z[:, 2]
+    leaves = sch.leaves_list(Z)
+
+    # position of every node (leaves first) along the leaf axis, and
+    # rank of its leftmost leaf; a node only depends on its children,
+    # which always come before it in the linkage matrix
+    pos = np.empty(2 * n - 1)
+    pos[leaves] = 5 + 10 * np.arange(n)
+    first = np.empty(2 * n - 1, dtype=np.intp)
+    first[leaves] = np.arange(n)
+    pos = pos.tolist()
+    first = first.tolist()
+    for i, (a, b) in enumerate(children.tolist()):
+        pos[n + i] = (pos[a] + pos[b]) / 2.
+        first[n + i] = first[a]
+    pos = np.asarray(pos)
+    first = np.asarray(first[n:])
+
+    node_heights = np.concatenate([np.zeros(n), heights])
+    left, right = children[:, 0], children[:, 1]
+    icoord = np.column_stack([pos[left], pos[left], pos[right], pos[right]])
+    dcoord = np.column_stack(
+        [node_heights[left], heights, heights, node_heights[right]]
+    )
+
+    # a cluster is a maximal subtree of links below the threshold; the
+    # clusters are numbered from left to right
+    if color_threshold is None:
+        color_threshold = 0.7 * heights.max()
+    below = heights < color_threshold
+    if color_threshold <= 0:
+        below[:] = False
+    parent = np.full(2 * n - 1, -1, dtype=np.intp)
+    parent[left] = np.arange(n - 1)
+    parent[right] = np.arange(n - 1)
+    link_parent = parent[n:]
+    parent_below = np.zeros(n - 1, dtype=bool)
+    has_parent = link_parent >= 0
+    parent_below[has_parent] = below[link_parent[has_parent]]
+    roots_first = np.sort(first[below & ~parent_below])
+    group = np.full(n - 1, -1, dtype=np.intp)
+    group[below] = np.searchsorted(roots_first, first[below], side="right") - 1
+
+    if orientation in ["top", "bottom"]:
+        xs, ys = icoord, dcoord
+    else:
+        xs, ys = dcoord, icoord
+    if orientation not in ["left", "bottom"]:
+        xs = -xs
+    if orientation not in ["right", "bottom"]:
+        ys = -ys
+
+    # group the links; within a trace, each link takes 4 points and is
+    # followed by a NaN
+    order = np.argsort(group, kind="stable")
+    groups, starts = np.unique(group[order], return_index=True)
+    nan = np.full((n - 1, 1), np.nan)
+    xs = np.hstack([xs, nan])[order]
+    ys = np.hstack([ys, nan])[order]
+
+    traces = []
+    for g, link_xs, link_ys in zip(
+            groups, np.split(xs, starts[1:]), np.split(ys, starts[1:])
+    ):
+        if g < 0:
+            color = ABOVE_THRESHOLD_COLOR
+        else:
+            color = LINK_COLORS[g % len(LINK_COLORS)]
+        traces.append(
+            dict(
+                type="scatter",
+                x=link_xs.ravel()[:-1],
+                y=link_ys.ravel()[:-1],
+                mode="lines",
+                marker=dict(color=color),
+                xaxis="x",
+                yaxis="y",
+            )
+        )
+
+    return traces
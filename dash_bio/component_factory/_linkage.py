@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy.cluster.vq as scv
+import scipy.spatial as scs
+
+# maximum number of distances computed at once by _chunked_pdist (64 MB
+# of float64 values)
+_BLOCK_ELEMENTS = 2 ** 23
+
+
+def _chunked_pdist(X, metric="euclidean", dtype=np.float32, n_jobs=1):
+    """Compute the condensed pairwise distance matrix block by block.
+
+    The result is written into a single preallocated array of the given
+    dtype, so that, with float32, it takes half the memory of
+    scipy.spatial.distance.pdist and no full-size temporary is created.
+    The blocks can be computed in parallel threads, since
+    scipy.spatial.distance does not parallelize the computation itself.
+
+    Parameters:
+    - X (ndarray): The observations, one per row.
+    - metric (string; default 'euclidean'): The distance metric (see
+        scipy.spatial.distance.cdist).
+    - dtype (dtype; default float32): The dtype of the distances.
+    - n_jobs (number; default 1): The number of threads.
+
+    Returns:
+    - ndarray: The condensed distance matrix.
+    """
+    n = X.shape[0]
+    d = np.empty(n * (n - 1) // 2, dtype=dtype)
+    block = max(1, _BLOCK_ELEMENTS // (max(n, 1) * n_jobs))
+
+    def fill(i0):
+        i1 = min(i0 + block, n - 1)
+        dist = scs.distance.cdist(X[i0:i1], X[i0:], metric=metric)
+        for i in range(i0, i1):
+            # distances from row i to rows i + 1, ..., n - 1
+            start = n * i - i * (i + 1) // 2
+            d[start:start + n - i - 1] = dist[i - i0, i - i0 + 1:]
+
+    if n_jobs > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            list(pool.map(fill, range(0, n - 1, block)))
+    else:
+        for i0 in range(0, n - 1, block):
+            fill(i0)
+    return d
+
+
+def _linkage(
+        X,
+        metric,
+        dist_fun,
+        link_fun,
+        optimal_ordering=False,
+        bin_size=None,
+        n_jobs=1,
+):
+    """Compute the hierarchical clustering of the rows of X.
+
+    This is a module-level function so that it can be submitted to a
+    process pool.
+
+    Parameters:
+    - X (ndarray): The observations, one per row.
+    - metric (string): The distance metric.
+    - dist_fun (function): The function that computes the condensed
+        distances.
+    - link_fun (function): The function that computes the linkage matrix
+        from condensed distances.
+    - optimal_ordering (bool; default False): Passed to `link_fun`.
+    - bin_size (number; optional): If the number of observations is
+        larger, they are clustered with _binned_linkage.
+    - n_jobs (number; default 1): The number of threads used to compute
+        the distances with the default `dist_fun`.
+
+    Returns:
+    - ndarray: The linkage matrix.
+    """
+    if bin_size is not None and X.shape[0] > bin_size:
+        return _binned_linkage(
+            X,
+            metric,
+            link_fun,
+            optimal_ordering=optimal_ordering,
+            bin_size=bin_size,
+            dist_fun=None if dist_fun is scs.distance.pdist else dist_fun,
+            n_jobs=n_jobs,
+        )
+    d = _distances(X, metric, dist_fun, n_jobs)
+    return link_fun(d, optimal_ordering=optimal_ordering)
+
+
+def _distances(X, metric, dist_fun, n_jobs=1):
+    """Compute the condensed distances between the rows of X.
+
+    Parameters:
+    - X (ndarray): The observations, one per row.
+    - metric (string): The distance metric.
+    - dist_fun (function): The function that computes the condensed
+        distances.
+    - n_jobs (number; default 1): The number of threads used with the
+        default `dist_fun`.
+
+    Returns:
+    - ndarray: The condensed distance matrix.
+    """
+    if dist_fun is scs.distance.pdist and n_jobs > 1:
+        return _chunked_pdist(X, metric=metric, dtype=np.float64, n_jobs=n_jobs)
+    return dist_fun(X, metric=metric)
+
+
+def _condensed_subset(d, n, idx):
+    """Return the condensed distances between a subset of the observations.
+
+    Parameters:
+    - d (ndarray): The condensed distances between n observations.
+    - n (number): The number of observations.
+    - idx (ndarray): The indices of the observations to keep, in their
+        new order.
+
+    Returns:
+    - ndarray: The condensed distances between the kept observations.
+    """
+    idx = np.asarray(idx, dtype=np.intp)
+    m = len(idx)
+    out = np.empty(m * (m - 1) // 2, dtype=d.dtype)
+    pos = 0
+    for i in range(m - 1):
+        lo = np.minimum(idx[i], idx[i + 1:])
+        hi = np.maximum(idx[i], idx[i + 1:])
+        out[pos:pos + m - i - 1] = d[n * lo - lo * (lo + 1) // 2 + hi - lo - 1]
+        pos += m - i - 1
+    return out
+
+
+def _condensed_append(d, X, Y, metric):
+    """Return the condensed distances after appending observations.
+
+    Parameters:
+    - d (ndarray): The condensed distances between the rows of X.
+    - X (ndarray): The observations, one per row.
+    - Y (ndarray): The appended observations, one per row.
+    - metric (string): The distance metric.
+
+    Returns:
+    - ndarray: The condensed distances between the rows of X and Y.
+    """
+    m = X.shape[0]
+    n = m + Y.shape[0]
+    cross = scs.distance.cdist(X, Y, metric=metric)
+    new = scs.distance.cdist(Y, Y, metric=metric)
+    out = np.empty(n * (n - 1) // 2, dtype=np.result_type(d, cross))
+    pos = 0
+    for i in range(n - 1):
+        if i < m:
+            start = m * i - i * (i + 1) // 2
+            out[pos:pos + m - i - 1] = d[start:start + m - i - 1]
+            out[pos + m - i - 1:pos + n - i - 1] = cross[i]
+        else:
+            out[pos:pos + n - i - 1] = new[i - m, i - m + 1:]
+        pos += n - i - 1
+    return out
+
+
+def _binned_linkage(
+        X,
+        metric,
+        link_fun,
+        optimal_ordering=False,
+        bin_size=2000,
+        dist_fun=None,
+        seed=0,
+        n_jobs=1,
+):
+    """Compute a hierarchical clustering of many observations in bounded
+    memory.
+
+    The observations are first split into bins of at most `bin_size`
+    observations with k-means (recursively, for the bins that are still
+    too large). Each bin is then clustered exactly, the bins are
+    clustered by their centroids, and the trees are joined into a single
+    linkage matrix over all of the observations. The heights of the
+    links that join bins are raised, if necessary, so that no link is
+    lower than its children.
+
+    Only the distances within one bin, or between the centroids of the
+    bins, are in memory at once: with n observations, the peak memory
+    used for distances is about 10 * max(bin_size, n / bin_size) ** 2
+    bytes (the float32 condensed distances, plus the float64 copies made
+    by the linkage function).
+
+    Parameters:
+    - X (ndarray): The observations, one per row.
+    - metric (string): The distance metric.
+    - link_fun (function): The function that computes the linkage matrix
+        from condensed distances.
+    - optimal_ordering (bool; default False): Passed to `link_fun`.
+    - bin_size (number; default 2000): The maximum number of observations
+        that are clustered exactly.
+    - dist_fun (function; optional): The function that computes the
+        condensed distances; by default, they are computed in float32
+        with _chunked_pdist.
+    - seed (number; default 0): The seed of the k-means initialization.
+    - n_jobs (number; default 1): The number of threads used to compute
+        the distances with _chunked_pdist.
+
+    Returns:
+    - ndarray: The linkage matrix.
+    """
+    n = X.shape[0]
+    if n == 1:
+        return np.empty((0, 4))
+    if n <= bin_size:
+        if dist_fun is None:
+            d = _chunked_pdist(X, metric=metric, n_jobs=n_jobs)
+        else:
+            d = dist_fun(X, metric=metric)
+        return link_fun(d, optimal_ordering=optimal_ordering)
+
+    k = -(-n // bin_size)
+    with warnings.catch_warnings():
+        # empty clusters are simply dropped
+        warnings.simplefilter("ignore")
+        _, labels = scv.kmeans2(
+            X.astype(np.float64, copy=False), k, minit="++", seed=seed
+        )
+    order = np.argsort(labels, kind="stable")
+    _, starts = np.unique(labels[order], return_index=True)
+    bins = np.split(order, starts[1:])
+    if len(bins) < 2:
+        # k-means cannot split identical observations
+        bins = np.array_split(np.arange(n), k)
+
+    subtrees = [
+        _binned_linkage(
+            X[idx], metric, link_fun, optimal_ordering, bin_size, dist_fun, seed,
+            n_jobs
+        )
+        for idx in bins
+    ]
+    centroids = np.stack([X[idx].mean(axis=0) for idx in bins])
+    top = _binned_linkage(
+        centroids, metric, link_fun, optimal_ordering, bin_size, dist_fun, seed,
+        n_jobs
+    )
+
+    return _join_linkages(bins, subtrees, top, n)
+
+
+def _join_linkages(bins, subtrees, top, n):
+    """Join the linkage matrices of disjoint groups of observations.
+
+    Parameters:
+    - bins (list[ndarray]): The indices of the observations in each group.
+    - subtrees (list[ndarray]): The linkage matrix of each group.
+    - top (ndarray): The linkage matrix of the groups themselves.
+    - n (number): The total number of observations.
+
+    Returns:
+    - ndarray: The linkage matrix of all of the observations.
+    """
+    Z = np.empty((n - 1, 4))
+    roots = np.empty(len(bins), dtype=np.intp)
+    sizes = np.empty(len(bins))
+    heights = np.empty(len(bins))
+    row = 0
+    for b, (idx, sub) in enumerate(zip(bins, subtrees)):
+        m = len(idx)
+        sizes[b] = m
+        if m == 1:
+            roots[b] = idx[0]
+            heights[b] = 0
+            continue
+        # relabel the leaves with their global index, and the links with
+        # their row in the joined matrix
+        children = sub[:, :2].astype(np.intp)
+        Z[row:row + m - 1, :2] = np.where(
+            children < m, idx[np.minimum(children, m - 1)], children - m + n + row
+        )
+        Z[row:row + m - 1, 2:] = sub[:, 2:]
+        roots[b] = n + row + m - 2
+        heights[b] = sub[-1, 2]
+        row += m - 1
+
+    k = len(bins)
+    node_sizes = np.concatenate([sizes, np.empty(k - 1)])
+    node_heights = np.concatenate([heights, np.empty(k - 1)])
+    for i, (a, b, h, _) in enumerate(top):
+        a, b = int(a), int(b)
+        node_sizes[k + i] = node_sizes[a] + node_sizes[b]
+        node_heights[k + i] = max(h, node_heights[a], node_heights[b])
+        Z[row + i] = [
+            roots[a] if a < k else n + row + a - k,
+            roots[b] if b < k else n + row + b - k,
+            node_heights[k + i],
+            node_sizes[k + i],
+        ]
+    return Z
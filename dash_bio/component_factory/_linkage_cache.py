@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import hashlib
+import os
+import tempfile
+import threading
+import types
+from collections import OrderedDict
+
+import numpy as np
+
+
+class LinkageCache:
+    """An in-process LRU cache for Clustergram linkage matrices.
+
+Entries are keyed by a fingerprint of the (preprocessed) data and of
+the clustering parameters, and hold the row/column linkage matrices
+together with the corresponding leaf orders. The least recently used
+entries are evicted once either `max_entries` or `max_bytes` is
+exceeded.
+
+Keyword arguments:
+
+- max_entries (number; default 32): Maximum number of clusterings kept
+    in the cache.
+- max_bytes (number; default 268435456): Maximum total size, in bytes,
+    of the arrays kept in the cache.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=256 * 2 ** 20):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the entry stored under `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value):
+        """Store the dict of arrays `value` under `key`."""
+        nbytes = _entry_nbytes(value)
+        if nbytes > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= _entry_nbytes(self._entries.pop(key))
+            self._entries[key] = value
+            self._nbytes += nbytes
+            while len(self._entries) > self._max_entries or \
+                    self._nbytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= _entry_nbytes(evicted)
+
+    def clear(self):
+        """Remove all of the entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
+class DiskLinkageCache:
+    """An on-disk cache for Clustergram linkage matrices.
+
+Each entry is stored as a `.npz` file in `directory`, so that the cache
+can be shared between the worker processes of a Dash app and survives
+restarts. Files are evicted in least recently used order once either
+`max_entries` or `max_bytes` is exceeded.
+
+Keyword arguments:
+
+- directory (string; required): The directory in which the entries
+    are stored. It is created if it does not exist.
+- max_entries (number; default 256): Maximum number of clusterings
+    kept in the cache.
+- max_bytes (number; default 1073741824): Maximum total size, in
+    bytes, of the files kept in the cache.
+    """
+
+    def __init__(self, directory, max_entries=256, max_bytes=2 ** 30):
+        self._directory = directory
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self._directory, '{}.npz'.format(key))
+
+    def __len__(self):
+        return len(self._files())
+
+    def _files(self):
+        return [
+            os.path.join(self._directory, f)
+            for f in os.listdir(self._directory) if f.endswith('.npz')
+        ]
+
+    def get(self, key):
+        """Return the entry stored under `key`, or None."""
+        path = self._path(key)
+        try:
+            with np.load(path) as npz:
+                entry = {k: npz[k] for k in npz.files}
+            # the modification time is used as the access time for eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def set(self, key, value):
+        """Store the dict of arrays `value` under `key`."""
+        fd, tmp_path = tempfile.mkstemp(suffix='.npz', dir=self._directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **value)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict()
+
+    def clear(self):
+        """Remove all of the entries from the cache."""
+        for path in self._files():
+            os.remove(path)
+
+    def _evict(self):
+        files = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(f[1] for f in files)
+        while files and (len(files) > self._max_entries or
+                         total > self._max_bytes):
+            _, size, path = files.pop(0)
+            total -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _entry_nbytes(entry):
+    return sum(np.asarray(v).nbytes for v in entry.values())
+
+
+def _callable_fingerprint(fun, _seen=None):
+    """Return a string that identifies a distance or linkage function, or
+    None if it cannot be identified reliably.
+
+    The bytecode and constants are included so that two lambdas calling,
+    e.g., `linkage(x, 'single')` and `linkage(x, 'complete')` get
+    different fingerprints, and so are the values of their closure cells,
+    of the module globals that they read, and the arguments of
+    `functools.partial` objects. Other callables
+    (e.g., instances of classes with a `__call__` method, or bound
+    methods) may depend on a state that is not fingerprinted, so they
+    get no fingerprint.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(fun) in _seen:
+        # a recursive function, which is already being fingerprinted
+        return 'recursive:' + (getattr(fun, '__qualname__', None) or '')
+    _seen = _seen | {id(fun)}
+
+    if isinstance(fun, functools.partial):
+        parts = [
+            _callable_fingerprint(fun.func, _seen),
+            _value_fingerprint(fun.args, _seen),
+            _value_fingerprint(fun.keywords, _seen),
+        ]
+        if None in parts:
+            return None
+        return 'partial(%s)' % '|'.join(parts)
+
+    if isinstance(fun, types.BuiltinFunctionType) and \
+            isinstance(getattr(fun, '__self__', None), (type(None), types.ModuleType)):
+        return '%s.%s' % (fun.__module__, fun.__qualname__)
+    if isinstance(fun, np.ufunc):
+        return 'numpy.' + fun.__name__
+    if not isinstance(fun, types.FunctionType):
+        return None
+
+    code = fun.__code__
+    parts = [
+        fun.__module__ or '',
+        fun.__qualname__,
+        _code_fingerprint(code),
+        _value_fingerprint(fun.__defaults__, _seen),
+        _value_fingerprint(fun.__kwdefaults__, _seen),
+        _globals_fingerprint(fun, _seen),
+    ]
+    for cell in fun.__closure__ or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:
+            # an empty cell
+            value = None
+        parts.append(_value_fingerprint(value, _seen))
+    if None in parts:
+        return None
+    return '|'.join(parts)
+
+
+def _globals_fingerprint(fun, _seen):
+    """Return a string that identifies the values of the module globals
+    read by the function `fun`, or None if one of them cannot be
+    identified reliably.
+
+    The functions and classes are identified by their name, so that the
+    globals of the library functions (e.g., of scipy) called by `fun` are
+    not fingerprinted.
+    """
+    items = []
+    for name in sorted(_code_names(fun.__code__)):
+        if name not in fun.__globals__:
+            # a builtin, or the name of an attribute
+            continue
+        value = fun.__globals__[name]
+        if isinstance(value, (type, types.FunctionType)):
+            value = 'name:%s.%s' % (value.__module__, value.__qualname__)
+        else:
+            value = _value_fingerprint(value, _seen)
+            if value is None:
+                return None
+        items.append('%s=%s' % (name, value))
+    return 'globals(%s)' % ','.join(items)
+
+
+def _code_names(code):
+    """Return the names used by a code object, including those of the
+    functions defined in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _code_fingerprint(code):
+    """Return a string that identifies a code object, including those of
+    the functions defined in it (whose repr includes their address)."""
+    consts = [
+        _code_fingerprint(c) if isinstance(c, types.CodeType) else repr(c)
+        for c in code.co_consts
+    ]
+    return '%s(%s)[%s]' % (
+        code.co_code.hex(), ','.join(code.co_names), ','.join(consts)
+    )
+
+
+def _value_fingerprint(value, _seen):
+    """Return a string that identifies a closure cell value or an argument
+    of a partial function, or None if it cannot be identified reliably."""
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return repr(value)
+    if isinstance(value, np.generic):
+        return repr((value.dtype.str, value.item()))
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            return None
+        value = np.ascontiguousarray(value)
+        digest = hashlib.blake2b(value.view(np.uint8).reshape(-1), digest_size=20)
+        return 'ndarray(%r,%s,%s)' % (value.shape, value.dtype.str, digest.hexdigest())
+    if isinstance(value, types.ModuleType):
+        return 'module:' + value.__name__
+    if isinstance(value, (tuple, list, frozenset, set)):
+        items = [_value_fingerprint(v, _seen) for v in value]
+        if isinstance(value, (frozenset, set)):
+            items = sorted(items, key=str)
+        if None in items:
+            return None
+        return '%s(%s)' % (type(value).__name__, ','.join(items))
+    if isinstance(value, dict):
+        items = [
+            (_value_fingerprint(k, _seen), _value_fingerprint(v, _seen))
+            for k, v in value.items()
+        ]
+        if any(None in item for item in items):
+            return None
+        return 'dict(%s)' % ','.join('%s:%s' % item for item in sorted(items))
+    if callable(value):
+        return _callable_fingerprint(value, _seen)
+    return None
+
+
+def _linkage_cache_key(data, **params):
+    """Return the cache key for clustering `data` with `params`.
+
+    Parameters:
+    - data (ndarray): The preprocessed data that is clustered.
+    - params: The clustering parameters; callables are fingerprinted.
+
+    Returns:
+    - string: A hexadecimal digest, or None if one of the callables
+        cannot be fingerprinted, in which case the clustering should not
+        be cached.
+    """
+    fingerprints = {}
+    for name in sorted(params):
+        value = params[name]
+        if callable(value):
+            value = _callable_fingerprint(value)
+            if value is None:
+                return None
+        fingerprints[name] = value
+
+    data = np.ascontiguousarray(data)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(repr((data.shape, data.dtype.str)).encode())
+    h.update(data.view(np.uint8).reshape(-1))
+    for name, value in fingerprints.items():
+        h.update(repr((name, value)).encode())
+    return h.hexdigest()
@@ -1,12 +1,17 @@
 from __future__ import absolute_import
 
+import numbers
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import pandas as pd
 from pandas.api.types import is_numeric_dtype
 
 import plotly.graph_objects as go
+from plotly import subplots
 
-from .utils import _get_hover_text
+from .utils import _HoverColumns, _check_hover_format, _get_density, \
+    _lazy_hover_rows, _take
 
 SUGGESTIVE_LINE_LABEL = "suggestive line"
 GENOMEWIDE_LINE_LABEL = "genomewide line"
@@ -36,15 +41,25 @@ def ManhattanPlot(
         genomewideline_width=1,
         highlight=True,
         highlight_color="red",
+        hover_format="text",
+        downsample=None,
+        downsample_threshold=None,
+        downsample_resolution=None,
+        single_trace=False,
+        x_range=None,
+        max_points=None,
 ):
     """Returns a figure for a manhattan plot.
 
 Keyword arguments:
-- dataframe (dataframe; required): A pandas dataframe which must contain at
-    least the following three columns:
+- dataframe (dataframe | PreparedManhattanPlot; required): A pandas
+    dataframe which must contain at least the following three columns:
             - the chromosome number
             - genomic base-pair position
             - a numeric quantity to plot such as a p-value or zscore
+    It can also be a PreparedManhattanPlot, in which case the column
+    arguments (`chrm`, `bp`, `p`, `snp`, `gene`, `annotation` and
+    `logp`) are the ones that it was prepared with.
 - chrm (string; default 'CHR'): A string denoting the column name for
     the chromosome. This column must be float or integer. Minimum
     number of chromosomes required is 1. If you have X, Y, or MT
@@ -110,6 +125,47 @@ Keyword arguments:
 - highlight_color (string; default 'red'): Color of the data points
     highlighted because they are significant. Can be in any color
     format accepted by plotly.graph_objects.
+- hover_format (string; default 'text'): How the hover information
+    (SNP, gene and annotation) is sent to the browser: 'text' sends
+    one pre-formatted string per point, while 'customdata' sends the
+    raw values as `customdata`, formatted in the browser with a
+    `hovertemplate`, which makes the figure smaller. 'lazy' only sends
+    the row of each point in the dataframe, as `customdata`: the hover
+    shows the coordinates of the point, and its details can be looked
+    up on the server, e.g., in a `hoverData` callback, with the
+    `hover_details` method of a PreparedManhattanPlot.
+- downsample (string; optional): Whether to thin out the points below
+    `downsample_threshold`, which overlap at the resolution of the
+    plot: 'bins' keeps one point per chromosome in each pixel, and
+    'random' keeps as many points, sampled at random within each
+    chromosome, while 'density' draws them as a heatmap of the number
+    of points per bin, whose size does not depend on the number of
+    points. All of the points above the threshold are kept, and the
+    number of points that were dropped is reported under the key
+    'downsampled_points' of the layout `meta`.
+- downsample_threshold (number; optional): The value (on the y axis)
+    above which all of the points are kept. By default, it is
+    `suggestiveline_value` or, if that is False,
+    `genomewideline_value`. If it is False (or None, with both lines
+    disabled), there is no threshold, and all of the points are
+    downsampled.
+- downsample_resolution (list; default [1000, 500]): The width and
+    height, in pixels, of the plotting area at which the plot should
+    look the same.
+- single_trace (bool; default False): Whether to draw all of the
+    chromosomes in a single WebGL trace, colored by chromosome, instead
+    of one trace per chromosome. The legend then has one empty entry per
+    chromosome, which cannot be used to hide them. This is faster to
+    serialize and to render for large inputs.
+- x_range (list; optional): The range of positions along the genome
+    (as in the x axis of the plot) of the points to plot; by default,
+    all of the points are plotted. Use `manhattan_plot_range` to get it
+    from the `relayoutData` of the graph when the user zooms in.
+- max_points (number; optional): The maximum number of points in view
+    (in `x_range`) that are all plotted. If there are more points, they
+    are downsampled (with the `downsample` method, or 'bins' by
+    default); otherwise, e.g. when zoomed into a locus, every point is
+    plotted, even if `downsample` is set.
 
     # ...
     Example 1: Random Manhattan Plot
@@ -124,16 +180,20 @@ Keyword arguments:
 
     """
 
-    mh = _ManhattanPlot(
-        dataframe,
-        chrm=chrm,
-        bp=bp,
-        p=p,
-        snp=snp,
-        gene=gene,
-        annotation=annotation,
-        logp=logp
-    )
+    if isinstance(dataframe, _ManhattanPlot):
+        # already prepared, e.g., with PreparedManhattanPlot
+        mh = dataframe
+    else:
+        mh = _ManhattanPlot(
+            dataframe,
+            chrm=chrm,
+            bp=bp,
+            p=p,
+            snp=snp,
+            gene=gene,
+            annotation=annotation,
+            logp=logp
+        )
 
     return mh.figure(
         title=title,
@@ -150,7 +210,264 @@ Keyword arguments:
         genomewideline_color=genomewideline_color,
         genomewideline_width=genomewideline_width,
         highlight=highlight,
-        highlight_color=highlight_color
+        highlight_color=highlight_color,
+        hover_format=hover_format,
+        downsample=downsample,
+        downsample_threshold=downsample_threshold,
+        downsample_resolution=downsample_resolution,
+        single_trace=single_trace,
+        x_range=x_range,
+        max_points=max_points
+    )
+
+
+def _downsample(
+        x,
+        y,
+        group,
+        threshold,
+        method="bins",
+        resolution=(1000, 500),
+        xrange=None,
+        yrange=None,
+        seed=0,
+):
+    """Select the points to draw so that the plot looks the same at a given
+    resolution.
+
+    The points above the threshold are all kept. Below it, the points
+    are binned by pixel (and by group, so that their color is kept):
+    with 'bins', the first point of each bin is kept; with 'random', as
+    many points are sampled at random within each group, in proportion
+    to the number of bins of the group.
+
+    Keyword arguments:
+    - x (ndarray; required): The x coordinates of the points.
+    - y (ndarray; required): The y coordinates of the points.
+    - group (ndarray; required): The group (e.g., chromosome) of each
+    point.
+    - threshold (number; required): The y value above which all of the
+    points are kept.
+    - method (string; default 'bins'): 'bins' or 'random'.
+    - resolution (list; default (1000, 500)): The width and height, in
+    pixels, of the plotting area.
+    - xrange (list; optional): The range of the x axis; by default, the
+    range of `x`.
+    - yrange (list; optional): The range of the y axis; by default, the
+    range of `y`.
+    - seed (number; default 0): The seed of the random sampling.
+
+    Returns:
+    - A boolean array, True for the points that are kept."""
+    width, height = int(resolution[0]), int(resolution[1])
+    finite = np.isfinite(y)
+    keep = finite & (y > threshold)
+    below = np.flatnonzero(finite & ~keep)
+    if len(below) == 0:
+        return keep
+
+    if xrange is None:
+        xrange = [np.min(x), np.max(x)]
+    if yrange is None:
+        yrange = [np.min(y[finite]), np.max(y[finite])]
+
+    def pixel(values, vrange, n):
+        span = float(vrange[1] - vrange[0]) or 1.
+        bins = ((values - vrange[0]) / span * n).astype(np.int64)
+        return np.clip(bins, 0, n - 1)
+
+    groups, group_codes = np.unique(group[below], return_inverse=True)
+    bins = (
+        group_codes.astype(np.int64) * width + pixel(x[below], xrange, width)
+    ) * height + pixel(y[below], yrange, height)
+    _, first = np.unique(bins, return_index=True)
+
+    if method == "bins":
+        keep[below[first]] = True
+        return keep
+
+    # the same number of points per group as with 'bins', sampled at
+    # random within the group
+    rs = np.random.RandomState(seed)
+    per_group = np.bincount(group_codes[first], minlength=len(groups))
+    order = np.argsort(group_codes, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(np.bincount(group_codes))])
+    for g, k in enumerate(per_group):
+        members = order[starts[g]:starts[g + 1]]
+        keep[below[rs.choice(members, size=k, replace=False)]] = True
+    return keep
+
+
+def MultiManhattanPlot(
+        dataframes,
+        titles=None,
+        miami=False,
+        chrm="CHR",
+        bp="BP",
+        p="P",
+        snp="SNP",
+        gene="GENE",
+        annotation=None,
+        logp=True,
+        title="Manhattan Plot",
+        xlabel=None,
+        showlegend=True,
+        vertical_spacing=None,
+        n_jobs=1,
+        **kwargs
+):
+    """Returns a figure with the manhattan plots of several studies.
+
+The studies are plotted in subplots, one above the other, with linked x
+axes: the positions along the genome are computed once, for all of the
+studies, so that a chromosome is at the same place in every subplot.
+With `miami`, the y axis of the second study is reversed, so that the
+two studies face each other (Miami plot).
+
+Keyword arguments:
+- dataframes (list; required): The pandas dataframes of the studies,
+    with the columns described in ManhattanPlot.
+- titles (list; optional): The title of each subplot.
+- miami (bool; default False): Whether to draw a Miami plot; there must
+    be exactly two studies.
+- chrm, bp, p, snp, gene, annotation, logp: The column arguments of
+    ManhattanPlot, which are the same for all of the studies.
+- title (string; default 'Manhattan Plot'): The title of the graph.
+- xlabel (string; optional): Label of the x axis.
+- showlegend (bool; default True): Whether to show the legend. The
+    legend entries of the first study also show and hide the points of
+    the other studies.
+- vertical_spacing (number; optional): The space between the subplots,
+    as a fraction of the height of the graph.
+- n_jobs (number; default 1): The number of threads used to build the
+    plots of the studies.
+- Additional keys (misc.): The other arguments of ManhattanPlot (e.g.,
+    `genomewideline_value`, `highlight`, `point_size`, `col`,
+    `single_trace` or `downsample`), which are the same for all of the
+    studies.
+    """
+    if miami and len(dataframes) != 2:
+        raise ValueError("A Miami plot needs exactly two studies")
+    n = len(dataframes)
+
+    coordinates = _genome_coordinates(dataframes, chrm=chrm, bp=bp)
+
+    def study_figure(i):
+        mh = _ManhattanPlot(
+            dataframes[i],
+            chrm=chrm,
+            bp=bp,
+            p=p,
+            snp=snp,
+            gene=gene,
+            annotation=annotation,
+            logp=logp,
+            coordinates=coordinates
+        )
+        return mh.figure(showlegend=showlegend and i == 0, **kwargs)
+
+    if n_jobs > 1 and n > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            figures = list(pool.map(study_figure, range(n)))
+    else:
+        figures = [study_figure(i) for i in range(n)]
+
+    if vertical_spacing is None:
+        vertical_spacing = 0.02 if miami else 0.3 / n
+    fig = subplots.make_subplots(
+        rows=n,
+        cols=1,
+        shared_xaxes=True,
+        vertical_spacing=vertical_spacing,
+        subplot_titles=titles,
+    )
+
+    downsampled_points = []
+    for i, study in enumerate(figures):
+        for trace in study.data:
+            # the legend entries of the first study show and hide the
+            # points of all of the studies
+            trace.legendgroup = trace.name
+            if i > 0:
+                trace.showlegend = False
+            fig.add_trace(trace, row=i + 1, col=1)
+        for shape in study.layout.shapes:
+            fig.add_shape(shape, row=i + 1, col=1)
+        fig.update_yaxes(
+            title=study.layout.yaxis.title.text, row=i + 1, col=1
+        )
+        if study.layout.meta:
+            downsampled_points.append(study.layout.meta['downsampled_points'])
+
+    xaxis = figures[0].layout.xaxis
+    fig.update_xaxes(range=xaxis.range, showgrid=xaxis.showgrid)
+    if xaxis.tickvals is not None:
+        fig.update_xaxes(
+            tickmode="array",
+            tickvals=xaxis.tickvals,
+            ticktext=xaxis.ticktext,
+            ticks="outside"
+        )
+    fig.update_xaxes(
+        title=xaxis.title.text if xlabel is None else xlabel, row=n, col=1
+    )
+    if miami:
+        fig.update_yaxes(autorange="reversed", row=2, col=1)
+
+    fig.update_layout(title=title, hovermode="closest", showlegend=showlegend)
+    if downsampled_points:
+        fig.update_layout(meta=dict(downsampled_points=downsampled_points))
+
+    return fig
+
+
+def manhattan_plot_range(relayout_data):
+    """Return the range of genome positions in view in a ManhattanPlot.
+
+Keyword arguments:
+- relayout_data (dict; optional): The `relayoutData` of the graph.
+
+Returns:
+- The [start, end] range of the x axis, which can be passed as the
+    `x_range` of ManhattanPlot, or None if the whole genome is in view
+    (or if the x axis did not change).
+    """
+    if not relayout_data or relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range' in relayout_data:
+        return list(relayout_data['xaxis.range'])
+    if 'xaxis.range[0]' in relayout_data and \
+            'xaxis.range[1]' in relayout_data:
+        return [relayout_data['xaxis.range[0]'],
+                relayout_data['xaxis.range[1]']]
+    return None
+
+
+def _genome_coordinates(dataframes, chrm="CHR", bp="BP"):
+    """Return the genome coordinate system shared by several studies.
+
+    The chromosomes are numbered in order of appearance in the studies,
+    and each of them spans the positions of all of the studies.
+
+    Keyword arguments:
+    - dataframes (list; required): The data of the studies.
+    - chrm (string; default 'CHR'): The column name for the chromosome.
+    - bp (string; default 'BP'): The column name for the position.
+
+    Returns:
+    - A dict with the chromosomes, and their smallest ('bp_min') and
+    largest ('bp_max') positions."""
+    ranges = [
+        df[bp].groupby(df[chrm].values, sort=False).agg(['min', 'max'])
+        for df in dataframes
+    ]
+    ranges = pd.concat(ranges).groupby(level=0, sort=False)
+    bp_min = ranges['min'].min()
+    bp_max = ranges['max'].max()
+    return dict(
+        chromosomes=bp_min.index.values,
+        bp_min=bp_min.values,
+        bp_max=bp_max.values,
     )
 
 
@@ -165,7 +482,8 @@ class _ManhattanPlot():
             snp="SNP",
             gene="GENE",
             annotation=None,
-            logp=True
+            logp=True,
+            coordinates=None
     ):
         """
         Keyword arguments:
@@ -206,6 +524,10 @@ class _ManhattanPlot():
         plotting the raw value could be useful for other genome-wide plots
         (e.g., peak heights, Bayes factors, test statistics, other
         "scores", etc.).
+        - coordinates (dict; optional): A genome coordinate system shared
+        with other plots, as returned by `_genome_coordinates`; by
+        default, it is computed from the data. The x axis (and the
+        horizontal lines) then span the whole coordinate system.
 
         Returns:
         - A ManhattanPlot object."""
@@ -286,13 +608,33 @@ class _ManhattanPlot():
 
         self.index = 'INDEX'
         self.pos = 'POSITION'
+        self.yName = 'Y_VALUE'
+        # sorted positions, built on demand by _in_range
+        self._position_order = None
+        self._sorted_positions = None
+        self._x_extent = None
+        self._y_extent = None
+        # last selection of rows, see _select_rows
+        self._selection = None
+        # hover information, generated on demand by _get_hover
+        self._hover_columns = None
+        self._hover = {}
+
+        # The values plotted on the y axis are computed once, and used
+        # both for the highlighting and in the traces
+        self.data[self.yName] = -np.log10(self.data[p].values) if logp \
+            else self.data[p].values
 
         # Fixes the bug where one chromosome is missing by adding a sequential
-        # index column.
-        idx = 0
-        for i in self.data[chrm].unique():
-            idx = idx + 1
-            self.data.loc[self.data[chrm] == i, self.index] = int(idx)
+        # index column, numbering the chromosomes in order of appearance.
+        if coordinates is None:
+            codes, chromosomes = pd.factorize(self.data[chrm])
+            chromosomes = np.asarray(chromosomes)
+        else:
+            chromosomes = coordinates['chromosomes']
+            codes = pd.Index(chromosomes).get_indexer(self.data[chrm])
+            self.nChr = len(chromosomes)
+        self.data[self.index] = codes + 1
         # Set the type to be the same as provided for chrm column
         self.data[self.index] = \
             self.data[self.index].astype(self.data[chrm].dtype)
@@ -311,42 +653,51 @@ class _ManhattanPlot():
         if self.nChr == 1:
             # For a single chromosome
             self.data[self.pos] = self.data[bp]
+            if coordinates is not None:
+                self._x_extent = [
+                    coordinates['bp_min'][0], coordinates['bp_max'][0]
+                ]
             self.ticks.append(int(len(self.data[self.pos]) / 2.) + 1)
             self.xlabel = "Chromosome %s position" % (self.data[chrm].unique())
             self.ticksLabels = self.ticks
         else:
-            # For multiple chromosomes
-            lastbase = 0
-            for i in self.data[self.index].unique():
-                if i == 1:
-                    self.data.loc[self.data[self.index] == i, self.pos] = \
-                        self.data.loc[self.data[self.index] == i, bp].values
-                else:
-                    prevbp = self.data.loc[self.data[self.index] == i - 1, bp]
-                    # Shift the basepair position by the largest bp of the
-                    # current chromosome
-                    lastbase = lastbase + prevbp.iat[-1]
-
-                    self.data.loc[self.data[self.index] == i, self.pos] = \
-                        self.data.loc[self.data[self.index] == i, bp].values \
-                        + lastbase
-
-                tmin = min(self.data.loc[self.data[self.index] == i, self.pos])
-                tmax = max(self.data.loc[self.data[self.index] == i, self.pos])
-                self.ticks.append(int((tmin + tmax) / 2.) + 1)
+            # For multiple chromosomes, shift the basepair positions of each
+            # chromosome by the sum of the largest basepair positions of
+            # the previous ones, all at once
+            if coordinates is None:
+                bp_range = self.data[bp].groupby(codes).agg(['min', 'max'])
+                bp_min = bp_range['min'].values
+                bp_max = bp_range['max'].values
+            else:
+                bp_min = coordinates['bp_min']
+                bp_max = coordinates['bp_max']
+            offsets = np.concatenate([[0], np.cumsum(bp_max)[:-1]])
+
+            self.data[self.pos] = self.data[bp].values + offsets[codes]
+            if coordinates is not None:
+                # the x axis spans the positions of all of the studies,
+                # whether this one has points there or not
+                self._x_extent = [
+                    (bp_min + offsets).min(), (bp_max + offsets).max()
+                ]
+            self.ticks = [
+                int(t) + 1 for t in (bp_min + bp_max) / 2. + offsets
+            ]
 
             self.xlabel = 'Chromosome'
+            # Compact position dtypes (e.g., int32) are widened, since the
+            # positions along the genome do not fit in them
             self.data[self.pos] = self.data[self.pos].astype(
-                self.data[bp].dtype)
+                np.promote_types(self.data[bp].dtype, np.int64))
 
             if self.nChr > 10:  # To avoid crowded labels
                 self.ticksLabels = [
                     t if np.mod(int(t), 2)  # Only every two ticks
                     else ''
-                    for t in self.data[chrm].unique()
+                    for t in chromosomes
                 ]
             else:
-                self.ticksLabels = self.data[chrm].unique()  # All the ticks
+                self.ticksLabels = chromosomes  # All the ticks
 
     def figure(
             self,
@@ -365,6 +716,13 @@ class _ManhattanPlot():
             genomewideline_width=1,
             highlight=True,
             highlight_color="red",
+            hover_format="text",
+            downsample=None,
+            downsample_threshold=None,
+            downsample_resolution=None,
+            single_trace=False,
+            x_range=None,
+            max_points=None,
     ):
         """Keyword arguments:
     - title (string; default 'Manhattan Plot'): The title of the
@@ -402,14 +760,48 @@ class _ManhattanPlot():
     - highlight_color (string; default 'red'): Color of the data
         points highlighted because they are significant. Can be in any
         color format accepted by plotly.graph_objects.
+    - hover_format (string; default 'text'): Whether the hover
+        information is sent as pre-formatted strings ('text'), as
+        `customdata` with a `hovertemplate` ('customdata'), or as the
+        row of each point, to be looked up with `hover_details`
+        ('lazy').
+    - downsample (string; optional): Whether to thin out the points
+        below `downsample_threshold`, by pixel bin ('bins') or by
+        random sampling within each chromosome ('random'), or draw them
+        as a heatmap of the number of points per bin ('density').
+    - downsample_threshold (number; optional): The value above which
+        all of the points are kept; by default, `suggestiveline_value`
+        or `genomewideline_value`. If False, all of the points are
+        downsampled.
+    - downsample_resolution (list; default [1000, 500]): The width and
+        height, in pixels, of the plotting area.
+    - single_trace (bool; default False): Whether to draw all of the
+        chromosomes in a single trace, colored by chromosome, with the
+        legend entries in separate empty traces.
+    - x_range (list; optional): The range of positions of the points
+        to plot.
+    - max_points (number; optional): The maximum number of points in
+        view that are plotted without downsampling.
 
     Returns:
     - A figure formatted for plotly.graph_objects.
 
         """
 
-        xmin = min(self.data[self.pos].values)
-        xmax = max(self.data[self.pos].values)
+        _check_hover_format(hover_format)
+        if downsample not in [None, 'bins', 'random', 'density']:
+            raise ValueError(
+                "downsample should be either None, 'bins', 'random' or "
+                "'density'"
+            )
+
+        pos = self.data[self.pos].values
+        y = self.data[self.yName].values
+        if x_range is None:
+            xmin, xmax = self._x_range()
+        else:
+            # only the points in view are plotted
+            xmin, xmax = x_range
 
         horizontallines = []
 
@@ -442,7 +834,6 @@ class _ManhattanPlot():
             horizontallines.append(genomewideline)
 
         data_to_plot = []  # To contain the data traces
-        tmp = pd.DataFrame()  # Empty DataFrame to contain the highlighted data
 
         if highlight:
             if not isinstance(highlight, bool):
@@ -457,44 +848,49 @@ class _ManhattanPlot():
                         "The genomewideline_value you entered is not a "
                         "positive value, or False, you cannot set highlight "
                         "to True in that case.")
-                tmp = self.data
-
-                # Sort the p-values (or -log10(p-values) above the line
-                if genomewideline_value:
-                    if self.logp:
-                        tmp = tmp.loc[-np.log10(tmp[self.pName])
-                                      > genomewideline_value]
-                    else:
-                        tmp = tmp.loc[tmp[self.pName] > genomewideline_value]
-
-                highlight_hover_text = _get_hover_text(
-                    tmp,
-                    snpname=self.snpName,
-                    genename=self.geneName,
-                    annotationname=self.annotationName
-                )
 
-                if not tmp.empty:
-                    data_to_plot.append(
-                        go.Scattergl(
-                            x=tmp[self.pos].values,
-                            y=-np.log10(tmp[self.pName].values) if self.logp
-                            else tmp[self.pName].values,
-                            mode="markers",
-                            text=highlight_hover_text,
-                            marker=dict(
-                                color=highlight_color,
-                                size=point_size
-                            ),
-                            name="Point(s) of interest"
-                        )
-                    )
+        if downsample_threshold is None:
+            downsample_threshold = suggestiveline_value or genomewideline_value
+        if downsample_threshold is None or downsample_threshold is False:
+            # without a threshold, all of the points are downsampled
+            downsample_threshold = np.inf
+        elif isinstance(downsample_threshold, bool) or \
+                not isinstance(downsample_threshold, numbers.Real):
+            raise ValueError(
+                "downsample_threshold should be a number, None or False"
+            )
+        if downsample_resolution is None:
+            downsample_resolution = [1000, 500]
 
-        # Remove the highlighted data from the DataFrame if not empty
-        if tmp.empty:
-            data = self.data
-        else:
-            data = self.data.drop(self.data.index[tmp.index])
+        highlight_rows, rows, downsampled_points, density = self._select_rows(
+            highlight=highlight is True,
+            genomewideline_value=genomewideline_value,
+            x_range=x_range,
+            downsample=downsample,
+            downsample_threshold=downsample_threshold,
+            downsample_resolution=tuple(downsample_resolution),
+            max_points=max_points,
+        )
+
+        hover = self._get_hover(hover_format)
+
+        if density is not None:
+            data_to_plot.append(go.Heatmap(**density))
+
+        if len(highlight_rows):
+            data_to_plot.append(
+                go.Scattergl(
+                    x=pos[highlight_rows],
+                    y=y[highlight_rows],
+                    mode="markers",
+                    marker=dict(
+                        color=highlight_color,
+                        size=point_size
+                    ),
+                    name="Point(s) of interest",
+                    **_take(hover, highlight_rows)
+                )
+            )
 
         if self.nChr == 1:
 
@@ -513,26 +909,18 @@ class _ManhattanPlot():
                 hovermode='closest'
             )
 
-            hover_text = _get_hover_text(
-                data,
-                snpname=self.snpName,
-                genename=self.geneName,
-                annotationname=self.annotationName
-            )
-
             data_to_plot.append(
                 go.Scattergl(
-                    x=data[self.pos].values,
-                    y=-np.log10(data[self.pName].values) if self.logp
-                    else data[self.pName].values,
+                    x=pos[rows],
+                    y=y[rows],
                     mode="markers",
                     showlegend=showlegend,
+                    name="chr%i" % self.data[self.chrName].iat[0],
                     marker={
                         'color': col[0],
-                        'size': point_size,
-                        'name': "chr%i" % data[self.chrName].unique()
+                        'size': point_size
                     },
-                    text=hover_text
+                    **_take(hover, rows)
                 )
             )
         else:
@@ -552,44 +940,310 @@ class _ManhattanPlot():
                 hovermode='closest'
             )
 
-            icol = 0
             if col is None:
                 col = [
                     'black' if np.mod(i, 2)
                     else 'grey' for i in range(self.nChr)
                 ]
 
-            for i in data[self.index].unique():
+            if single_trace:
+                data_to_plot.extend(self._single_trace(
+                    rows, hover, col, point_size, showlegend
+                ))
+            else:
+                index = self.data[self.index].values
+                chromosomes = self.data[self.chrName].values
+                for i in pd.unique(index[rows]):
+
+                    tmp = rows[index[rows] == i]
+
+                    chromo = chromosomes[tmp[0]]  # Get chromosome name
+
+                    data_to_plot.append(
+                        go.Scattergl(
+                            x=pos[tmp],
+                            y=y[tmp],
+                            mode="markers",
+                            showlegend=showlegend,
+                            name="Chr%i" % chromo,
+                            marker={
+                                # the color of the chromosome, even if
+                                # the ones before it are not plotted
+                                'color': col[i - 1],
+                                'size': point_size
+                            },
+                            **_take(hover, tmp)
+                        )
+                    )
+
+        layout.shapes = horizontallines
+        if downsampled_points is not None:
+            layout.meta = dict(downsampled_points=downsampled_points)
+
+        return go.Figure(data=data_to_plot, layout=layout)
+
+    def _select_rows(
+            self,
+            highlight,
+            genomewideline_value,
+            x_range,
+            downsample,
+            downsample_threshold,
+            downsample_resolution,
+            max_points,
+    ):
+        """Return the rows of the highlighted points and of the other
+        points to plot.
 
-                tmp = data[data[self.index] == i]
+        The points are split between the highlighted and the other ones
+        with a boolean mask, and the traces take the column arrays at the
+        rows of each set. The selection is cached, so that it is not
+        computed again when only the style of the figure changes.
 
-                chromo = tmp[self.chrName].unique()  # Get chromosome name
+        Keyword arguments:
+        - highlight (bool; required): Whether the points above
+        `genomewideline_value` are highlighted.
+        - Other keys: See the `figure` method.
 
-                hover_text = _get_hover_text(
-                    data,
-                    snpname=self.snpName,
-                    genename=self.geneName,
-                    annotationname=self.annotationName
+        Returns:
+        - The rows of the highlighted points.
+        - The rows of the other points.
+        - The number of points dropped by downsampling, or None.
+        - The density heatmap of the dropped points (see
+        `_get_density`), or None."""
+        key = (
+            highlight,
+            genomewideline_value,
+            None if x_range is None else tuple(x_range),
+            downsample,
+            downsample_threshold,
+            downsample_resolution,
+            max_points,
+        )
+        if self._selection is not None and self._selection[0] == key:
+            return self._selection[1]
+
+        pos = self.data[self.pos].values
+        y = self.data[self.yName].values
+        if x_range is None:
+            xmin, xmax = self._x_range()
+            in_view = np.ones(len(pos), dtype=bool)
+        else:
+            xmin, xmax = x_range
+            in_view = self._in_range(xmin, xmax)
+
+        highlighted = np.zeros(len(pos), dtype=bool)
+        if highlight:
+            highlighted = in_view
+
+            # Sort the p-values (or -log10(p-values) above the line
+            if genomewideline_value:
+                highlighted = in_view & (y > genomewideline_value)
+
+        highlight_rows = np.flatnonzero(highlighted)
+        rows = np.flatnonzero(in_view & ~highlighted)
+
+        # all of the points in view are plotted if there are few of them
+        if max_points is not None:
+            if len(rows) <= max_points:
+                downsample = None
+            elif downsample is None:
+                downsample = 'bins'
+
+        downsampled_points = None
+        density = None
+        if downsample == 'density':
+            dense = np.isfinite(y[rows]) & (y[rows] <= downsample_threshold)
+            downsampled_points = int(np.count_nonzero(dense))
+            # without finite points below the threshold, there is no
+            # heatmap, and the y axis is autoranged
+            if downsampled_points:
+                density = _get_density(
+                    pos[rows[dense]],
+                    y[rows[dense]],
+                    resolution=downsample_resolution,
+                    xrange=[xmin, xmax],
+                    yrange=[
+                        self._y_range()[0],
+                        self._y_range()[1] if np.isinf(downsample_threshold)
+                        else downsample_threshold
+                    ],
                 )
+                rows = rows[~dense]
+        elif downsample is not None:
+            keep = _downsample(
+                pos[rows],
+                y[rows],
+                self.data[self.index].values[rows],
+                downsample_threshold,
+                method=downsample,
+                resolution=downsample_resolution,
+                xrange=[xmin, xmax],
+                yrange=self._y_range(),
+            )
+            downsampled_points = int(len(keep) - np.count_nonzero(keep))
+            rows = rows[keep]
 
-                data_to_plot.append(
+        self._selection = (
+            key, (highlight_rows, rows, downsampled_points, density)
+        )
+        return self._selection[1]
+
+    def _x_range(self):
+        """Return the range of the positions of all of the points."""
+        if self._x_extent is None:
+            pos = self.data[self.pos].values
+            self._x_extent = [pos.min(), pos.max()]
+        return self._x_extent
+
+    def _in_range(self, xmin, xmax):
+        """Return a boolean mask of the points whose position is in
+        [xmin, xmax].
+
+        The points are looked up in an index of the positions, sorted
+        once (i.e., sorted by chromosome, then by base-pair position)
+        the first time that this is called."""
+        if self._sorted_positions is None:
+            positions = self.data[self.pos].values
+            self._position_order = np.argsort(positions, kind='stable')
+            self._sorted_positions = positions[self._position_order]
+        start = np.searchsorted(self._sorted_positions, xmin, side='left')
+        stop = np.searchsorted(self._sorted_positions, xmax, side='right')
+        mask = np.zeros(len(self._sorted_positions), dtype=bool)
+        mask[self._position_order[start:stop]] = True
+        return mask
+
+    def _y_range(self):
+        """Return the range of the finite y values of all of the points."""
+        if self._y_extent is None:
+            y = self.data[self.yName].values
+            y = y[np.isfinite(y)]
+            self._y_extent = [y.min(), y.max()] if len(y) else None
+        return self._y_extent
+
+    def _single_trace(self, rows, hover, col, point_size, showlegend):
+        """Return the traces that draw all of the chromosomes at once.
+
+        The points are in a single trace, whose marker colors are the
+        chromosome numbers mapped to `col` through a discrete colorscale;
+        the legend entries are empty traces, one per chromosome.
+
+        Keyword arguments:
+        - rows (ndarray; required): The rows of the points.
+        - hover (dict; required): The hover information of all of the
+        points.
+        - col (list; required): The color of each chromosome.
+        - point_size (number; required): The size of the points.
+        - showlegend (bool; required): Whether to show the legend.
+
+        Returns:
+        - A list of traces."""
+        codes, indices = pd.factorize(self.data[self.index].values[rows])
+        chromosomes = pd.unique(self.data[self.chrName].values[rows])
+        # the color of each chromosome, even if the ones before it are not
+        # plotted
+        colors = [col[(i - 1) % len(col)] for i in indices]
+        n = max(len(colors), 1)
+        colorscale = []
+        for i, color in enumerate(colors):
+            colorscale.append([i / n, color])
+            colorscale.append([(i + 1) / n, color])
+
+        traces = [
+            go.Scattergl(
+                x=self.data[self.pos].values[rows],
+                y=self.data[self.yName].values[rows],
+                mode="markers",
+                showlegend=False,
+                name="",
+                marker={
+                    'color': codes.astype(np.uint8 if n < 256 else np.int32),
+                    'colorscale': colorscale,
+                    'cmin': -0.5,
+                    'cmax': n - 0.5,
+                    'size': point_size
+                },
+                **_take(hover, rows)
+            )
+        ]
+        if showlegend:
+            for i, chromo in enumerate(chromosomes):
+                traces.append(
                     go.Scattergl(
-                        x=tmp[self.pos].values,
-                        y=-np.log10(tmp[self.pName].values) if self.logp
-                        else tmp[self.pName].values,
+                        x=[None],
+                        y=[None],
                         mode="markers",
-                        showlegend=showlegend,
                         name="Chr%i" % chromo,
-                        marker={
-                            'color': col[icol],
-                            'size': point_size
-                        },
-                        text=hover_text
+                        marker={'color': colors[i], 'size': point_size}
                     )
                 )
+        return traces
 
-                icol = icol + 1
+    def _get_hover(self, hover_format="text"):
+        """Return the hover information of all of the points, as the
+        keyword arguments of a trace.
 
-        layout.shapes = horizontallines
+        It is generated once per format, then the traces take it at the
+        rows of their points (see `_take`).
 
-        return go.Figure(data=data_to_plot, layout=layout)
+        Keyword arguments:
+        - hover_format (string; default 'text'): 'text', 'customdata' or
+        'lazy' (see the `figure` method).
+
+        Returns:
+        - A dict with either the 'text' or the 'customdata' and
+        'hovertemplate' of the points."""
+        if hover_format not in self._hover:
+            self._hover[hover_format] = \
+                self._get_hover_columns().trace_arrays(hover_format)
+        return self._hover[hover_format]
+
+    def _get_hover_columns(self):
+        """Return the hover columns, stored as categorical codes the first
+        time that they are needed."""
+        if self._hover_columns is None:
+            self._hover_columns = _HoverColumns(
+                self.data,
+                snpname=self.snpName,
+                genename=self.geneName,
+                annotationname=self.annotationName
+            )
+        return self._hover_columns
+
+    def hover_details(self, hover_data):
+        """Return the SNP, gene and annotation of the hovered points of a
+        figure with the 'lazy' hover format.
+
+        Keyword arguments:
+        - hover_data (dict; required): The `hoverData` (or `clickData`)
+        of the graph.
+
+        Returns:
+        - A list with one dict per point, with the value of each hover
+        column."""
+        return self._get_hover_columns().details(_lazy_hover_rows(hover_data))
+
+
+class PreparedManhattanPlot(_ManhattanPlot):
+    """The data of a ManhattanPlot, prepared once to plot it many times.
+
+The columns are validated, and the positions along the genome, the
+ticks and the plotted y values are computed when the object is created;
+the hover information, the index of the positions and the selection of
+the highlighted points are computed the first time that they are
+needed, and then kept. Pass the object to ManhattanPlot instead of the
+dataframe (e.g., in a Dash callback that changes the threshold, the
+colors or the point size): only the traces are rebuilt. The object can
+be pickled, e.g., to cache it per dataset.
+
+Keyword arguments:
+
+- dataframe (dataframe; required): The data, as for ManhattanPlot.
+- chrm, bp, p, snp, gene, annotation, logp: The column arguments of
+    ManhattanPlot.
+
+Example:
+
+    prepared = PreparedManhattanPlot(df)
+    fig = ManhattanPlot(prepared, genomewideline_value=6)
+    """
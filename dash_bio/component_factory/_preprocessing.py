@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# maximum number of values copied at once to compute medians (64 MB of
+# float64 values)
+_BLOCK_ELEMENTS = 2 ** 23
+
+
+def _preprocess(
+        data,
+        dtype="float64",
+        imputer_parameters=None,
+        log_transform=False,
+        standardize="none",
+):
+    """Impute, log-transform and standardize the data of a Clustergram.
+
+    All of the steps work in place on a single buffer of the given dtype,
+    so that the peak memory is about the size of that buffer (instead of
+    one full-size copy per step). The input is only copied if one of the
+    steps modifies the data or if it is not already of the given dtype.
+
+    Parameters:
+    - data (ndarray): The observations, one per row.
+    - dtype (string; default 'float64'): The dtype of the preprocessed
+        data, 'float32' or 'float64'.
+    - imputer_parameters (dict; optional): The imputation parameters (see
+        the `imputer_parameters` argument of Clustergram). Missing values
+        given as NaN are imputed in place with the 'mean' or 'median'
+        strategy; other cases are handled by sklearn's SimpleImputer.
+    - log_transform (bool; default False): Whether or not to apply log2.
+    - standardize (string; default 'none'): The dimension across which
+        the data is standardized, 'row', 'column' or 'none'.
+
+    Returns:
+    - ndarray: The preprocessed data.
+    """
+    in_place = (
+        imputer_parameters is not None
+        or log_transform
+        or standardize in ["row", "column"]
+    )
+    if in_place:
+        buf = np.array(data, dtype=dtype)
+    else:
+        buf = np.asarray(data, dtype=dtype)
+
+    if imputer_parameters is not None:
+        buf = _impute(buf, imputer_parameters)
+    if log_transform:
+        np.log2(buf, out=buf)
+    if standardize == "row":
+        _zscore(buf, axis=1)
+    elif standardize == "column":
+        _zscore(buf, axis=0)
+
+    return buf
+
+
+def _impute(buf, imputer_parameters):
+    """Replace the missing values of `buf`, in place if possible.
+
+    As with the `imputer_parameters` of Clustergram, 'axis' 0 uses the
+    statistics of each row and 'axis' 1 the ones of each column.
+
+    Parameters:
+    - buf (ndarray): The data.
+    - imputer_parameters (dict): The 'missing_values', 'strategy' and
+        'axis' parameters.
+
+    Returns:
+    - ndarray: The imputed data (`buf` itself, unless sklearn is used).
+    """
+    missing_values = imputer_parameters["missing_values"]
+    strategy = imputer_parameters["strategy"]
+    # statistics of each row (axis 0) or of each column (axis 1)
+    axis = 1 if imputer_parameters["axis"] == 0 else 0
+
+    fast = (
+        strategy in ["mean", "median"]
+        and isinstance(missing_values, float)
+        and np.isnan(missing_values)
+    )
+    if fast:
+        mask = np.isnan(buf)
+        counts = buf.shape[axis] - np.count_nonzero(mask, axis=axis)
+        # SimpleImputer drops the lines without any value
+        fast = bool(counts.all())
+
+    if not fast:
+        from sklearn.impute import SimpleImputer
+
+        imp = SimpleImputer(missing_values=missing_values, strategy=strategy)
+        if axis == 1:
+            imputed = imp.fit_transform(buf.T).T
+        else:
+            imputed = imp.fit_transform(buf)
+        return imputed.astype(buf.dtype, copy=False)
+
+    if not mask.any():
+        return buf
+
+    if strategy == "mean":
+        buf[mask] = 0
+        stats = np.sum(buf, axis=axis) / counts
+    else:
+        # nanmedian copies its input, so it is computed block by block
+        n = buf.shape[1 - axis]
+        block = max(1, _BLOCK_ELEMENTS // max(buf.shape[axis], 1))
+        stats = np.empty(n, dtype=buf.dtype)
+        for i0 in range(0, n, block):
+            lines = buf[i0:i0 + block] if axis == 1 else buf[:, i0:i0 + block]
+            stats[i0:i0 + block] = np.nanmedian(lines, axis=axis)
+
+    rows, cols = np.nonzero(mask)
+    buf[rows, cols] = stats[rows] if axis == 1 else stats[cols]
+    return buf
+
+
+def _zscore(buf, axis):
+    """Standardize `buf` in place, like scipy.stats.zscore.
+
+    Parameters:
+    - buf (ndarray): The data.
+    - axis (number): The axis along which the mean and the (population)
+        standard deviation are computed.
+    """
+    buf -= np.mean(buf, axis=axis, keepdims=True)
+    subscripts = "ij,ij->i" if axis == 1 else "ij,ij->j"
+    std = np.sqrt(np.einsum(subscripts, buf, buf) / buf.shape[axis])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        buf /= np.expand_dims(std, axis)
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# numbers of the chromosomes that are not numbered, as suggested in the
+# documentation of ManhattanPlot
+CHROMOSOME_NUMBERS = {'X': 23, 'Y': 24, 'MT': 25, 'M': 25}
+
+
+def read_summary_stats(
+        filepath_or_buffer,
+        chrm="CHR",
+        bp="BP",
+        p="P",
+        snp="SNP",
+        gene=None,
+        annotation=None,
+        sep="\t",
+        chunksize=1000000,
+        chromosome_map=None,
+        p_dtype="float32",
+        **kwargs
+):
+    """Read GWAS summary statistics for a ManhattanPlot, in bounded memory.
+
+The file is read in chunks, and only the columns used by ManhattanPlot
+are kept, in compact dtypes: int8 chromosome numbers, int32 base-pair
+positions, float32 p-values and categorical SNP and gene names. The
+chromosomes may be given as numbers or names, with or without a 'chr'
+prefix; X, Y and MT (or M) are numbered 23, 24 and 25. The rows in
+which the chromosome, position or p-value is missing are dropped.
+
+Keyword arguments:
+- filepath_or_buffer (string | file; required): The path, URL or file
+    object of a delimited text file, which may be compressed (e.g.,
+    with gzip; see pandas.read_csv).
+- chrm (string; default 'CHR'): The column name for the chromosome.
+- bp (string; default 'BP'): The column name for the chromosomal
+    position.
+- p (string; default 'P'): The column name for the p-value.
+- snp (string; default 'SNP'): The column name for the SNP names; None
+    to leave them out.
+- gene (string; optional): The column name for the gene names.
+- annotation (string; optional): The column name for an annotation.
+- sep (string; default '\\t'): The delimiter, e.g., ',' for CSV files.
+- chunksize (number; default 1000000): The number of rows read at
+    once.
+- chromosome_map (dict; optional): The numbers of the chromosome names
+    that are not numbers, in addition to (or instead of) X, Y and MT.
+    Like the chromosomes, the names may have a 'chr' prefix.
+- p_dtype (string; default 'float32'): The dtype of the p-values. With
+    'float32', the p-values smaller than about 1e-38 are clipped to the
+    smallest normal float32 value; use 'float64' to keep them.
+- Additional keys (misc.): Passed to pandas.read_csv (e.g.,
+    `compression` or `comment`).
+
+Returns:
+- A pandas DataFrame with the columns `chrm`, `bp`, `p` (and `snp`,
+    `gene` and `annotation`, if given), which can be passed to
+    ManhattanPlot. It has the same dtypes when there are no rows.
+    """
+    mapping = dict(CHROMOSOME_NUMBERS)
+    if chromosome_map is not None:
+        names = _chromosome_names(pd.Index(list(chromosome_map)))
+        mapping.update(zip(names, chromosome_map.values()))
+
+    columns = [c for c in [chrm, bp, p, snp, gene, annotation] if c is not None]
+    categorical = [c for c in [snp, gene] if c is not None]
+    dtype = {chrm: 'category'}
+
+    reader = pd.read_csv(
+        filepath_or_buffer,
+        sep=sep,
+        usecols=columns,
+        dtype=dtype,
+        chunksize=chunksize,
+        **kwargs
+    )
+
+    chunks = []
+    for chunk in reader:
+        chunk = chunk.dropna(subset=[chrm, bp, p])
+        chunks.append(pd.DataFrame({
+            chrm: _chromosome_numbers(chunk[chrm], mapping),
+            bp: chunk[bp].values.astype(np.int32),
+            p: _compact_p_values(chunk[p].values, p_dtype),
+        }))
+        for c in columns[3:]:
+            # the names are categorized chunk by chunk, so that the whole
+            # column is never held as strings
+            chunks[-1][c] = pd.Categorical(chunk[c].values) \
+                if c in categorical else chunk[c].values
+
+    data = {}
+    for c in columns:
+        if c in categorical:
+            # the categories are in order of appearance, since sorting
+            # them would copy them
+            data[c] = union_categoricals(
+                [chunk[c].values for chunk in chunks]
+            ) if chunks else pd.Categorical([])
+        elif chunks:
+            data[c] = np.concatenate([chunk[c].values for chunk in chunks])
+        else:
+            data[c] = np.array([], dtype=object)
+    if not chunks:
+        data[chrm] = np.array([], dtype=np.int8)
+        data[bp] = np.array([], dtype=np.int32)
+        data[p] = np.array([], dtype=p_dtype)
+    return pd.DataFrame(data, columns=columns)
+
+
+def _chromosome_numbers(chromosomes, mapping):
+    """Return the int8 numbers of a categorical column of chromosomes.
+
+    Only the categories are parsed, so that this is fast even for long
+    columns. The categories of the dropped rows are left out.
+    """
+    chromosomes = chromosomes.cat.remove_unused_categories()
+    names = _chromosome_names(chromosomes.cat.categories)
+    numbers = pd.to_numeric(pd.Series(names), errors='coerce')
+    numbers = numbers.fillna(pd.Series(names).map(mapping))
+    unknown = names[numbers.isna().values]
+    if len(unknown):
+        raise ValueError(
+            "Unknown chromosome(s) %s; use chromosome_map to number them"
+            % ', '.join(unknown)
+        )
+    if numbers.max() > np.iinfo(np.int8).max:
+        raise ValueError("Chromosome numbers should be at most 127")
+    return numbers.values.astype(np.int8)[chromosomes.cat.codes.values]
+
+
+def _chromosome_names(names):
+    """Return the chromosome names of an index, without any 'chr' prefix and
+    in upper case."""
+    names = names.astype(str).str.strip()
+    return names.str.replace('^chr', '', case=False, regex=True).str.upper()
+
+
+def _compact_p_values(values, dtype):
+    """Convert p-values to `dtype`, without turning small values to 0."""
+    values = np.asarray(values)
+    if np.dtype(dtype).itemsize < values.dtype.itemsize:
+        values = np.maximum(values, np.finfo(dtype).tiny)
+    return values.astype(dtype)
@@ -5,8 +5,10 @@ import pandas as pd
 from pandas.api.types import is_numeric_dtype
 
 import plotly.graph_objects as go
+from plotly import subplots
 
-from .utils import _get_hover_text
+from .utils import _HoverColumns, _check_hover_format, _get_density, \
+    _lazy_hover_rows, _take
 
 GENOMEWIDE_LINE_LABEL = 'genomewide_line'
 EFFECT_SIZE_LINE_MIN_LABEL = 'effect size min line'
@@ -33,17 +35,23 @@ def VolcanoPlot(
         genomewideline_width=1,
         highlight=True,
         highlight_color="red",
+        density=False,
+        density_resolution=None,
+        hover_format='text',
         **kwargs
 ):
     """Return a Dash Bio VolcanoPlot figure.
 
 Keyword arguments:
-- dataframe (dataframe; required): A pandas dataframe which must contain at
-    least the following two columns:
+- dataframe (dataframe | PreparedVolcanoPlot; required): A pandas
+    dataframe which must contain at least the following two columns:
             - a numeric quantity to plot such as a p-value or zscore
             - a numeric quantity measuring the strength of association,
               typically an odds ratio, regression coefficient, or log fold
               change. Here, it is referred to as `effect_size`.
+    It can also be a PreparedVolcanoPlot, in which case the column
+    arguments (`effect_size`, `p`, `snp`, `gene`, `annotation` and
+    `logp`) are the ones given to PreparedVolcanoPlot.
 - effect_size (string; default 'EFFECTSIZE'): A string denoting the
     column name for the effect size. This column must be numeric and must
     not contain missing nor NaN values.
@@ -102,6 +110,24 @@ Keyword arguments:
 - highlight_color (string; default 'red'): Color of the data points
     highlighted because considered significant. Can be in any color
     format accepted by plotly.graph_objects.
+- density (bool; default False): Whether to draw the points that are
+    neither past the genome-wide line nor past the effect size lines as
+    a heatmap of the number of points per bin, instead of one marker
+    per point. The size of the heatmap does not depend on the number
+    of points, and the number of points that it replaces is reported
+    under the key 'downsampled_points' of the layout `meta`.
+- density_resolution (list; default [1000, 500]): The width and
+    height, in pixels, of the plotting area, which set the number of
+    bins of the density heatmap.
+- hover_format (string; default 'text'): How the hover information
+    (SNP, gene and annotation) is sent to the browser: 'text' sends
+    one pre-formatted string per point, while 'customdata' sends the
+    raw values as `customdata`, formatted in the browser with a
+    `hovertemplate`. 'lazy' only sends the row of each point in the
+    dataframe, as `customdata`: the hover shows the coordinates of the
+    point, and its details can be looked up on the server, e.g., in a
+    `hoverData` callback, with the `hover_details` method of a
+    PreparedVolcanoPlot.
 
     # ...
     Example 1: Random Volcano Plot
@@ -134,15 +160,19 @@ Keyword arguments:
         instance with compatible properties.
     """
 
-    vp = _VolcanoPlot(
-        dataframe,
-        effect_size=effect_size,
-        p=p,
-        snp=snp,
-        gene=gene,
-        annotation=annotation,
-        logp=logp
-    )
+    if isinstance(dataframe, _VolcanoPlot):
+        # already prepared, e.g., with PreparedVolcanoPlot
+        vp = dataframe
+    else:
+        vp = _VolcanoPlot(
+            dataframe,
+            effect_size=effect_size,
+            p=p,
+            snp=snp,
+            gene=gene,
+            annotation=annotation,
+            logp=logp
+        )
 
     return vp.figure(
         xlabel=xlabel,
@@ -157,12 +187,206 @@ Keyword arguments:
         genomewideline_width=genomewideline_width,
         highlight=highlight,
         highlight_color=highlight_color,
+        density=density,
+        density_resolution=density_resolution,
+        hover_format=hover_format,
+        **kwargs
+    )
+
+
+def MultiVolcanoPlot(
+        dataframe,
+        contrast='CONTRAST',
+        effect_size='EFFECTSIZE',
+        p='P',
+        snp=None,
+        gene='GENE',
+        annotation=None,
+        logp=True,
+        columns=None,
+        xlabel=None,
+        ylabel='-log10(p)',
+        point_size=5,
+        col=None,
+        effect_size_line=None,
+        effect_size_line_color='grey',
+        effect_size_line_width=0.5,
+        genomewideline_value=-np.log10(5e-8),
+        genomewideline_color='grey',
+        genomewideline_width=1,
+        highlight=True,
+        highlight_color="red",
+        hover_format='customdata',
         **kwargs
+):
+    """Return a grid of VolcanoPlots, one per contrast of a long table.
+
+The columns are validated, the y values, the significant points and the
+hover information are computed once for the whole table, and the rows of each
+contrast are found with a single sort; the panels share their axes, so
+that the contrasts can be compared.
+
+Keyword arguments:
+- dataframe (dataframe; required): A pandas dataframe with one row per
+    contrast and point (e.g., gene), with the columns described in
+    VolcanoPlot and a column for the contrast.
+- contrast (string; default 'CONTRAST'): The column name for the
+    contrast. There is one panel per contrast, in order of appearance.
+- effect_size, p, snp, gene, annotation, logp: The column arguments of
+    VolcanoPlot; `snp` is None by default.
+- columns (number; optional): The number of panels per row; by
+    default, the panels are laid out in a square grid.
+- hover_format (string; default 'customdata'): The hover format of
+    VolcanoPlot. By default, the hover values are sent as `customdata`
+    and formatted by a `hovertemplate`, which is smaller than the text
+    of each point; with 'lazy', the `customdata` of each point is only
+    its row in `dataframe`.
+- Other keys: The arguments of VolcanoPlot (e.g., `effect_size_line`,
+    `genomewideline_value` or `highlight_color`), which are the same for
+    all of the panels, and the layout arguments.
+    """
+    # allow referring to protected member
+    # pylint: disable=W0212
+    if contrast not in dataframe.columns.values:
+        raise KeyError("Column %s not found in 'x' data.frame" % contrast)
+
+    vp = _VolcanoPlot(
+        dataframe,
+        effect_size=effect_size,
+        p=p,
+        snp=snp,
+        gene=gene,
+        annotation=annotation,
+        logp=logp
     )
 
+    if xlabel is None:
+        xlabel = vp.xlabel
+    if col is None:
+        col = 'black'
+    effect_size_line = _effect_size_line(effect_size_line)
+
+    x = vp.data[vp.effectSize].values
+    y = vp.data[vp.yName].values
+    xlim, _, _ = vp._axis_ranges()
+    highlighted, _ = vp._masks(
+        effect_size_line, genomewideline_value, highlight, False
+    )
+    _check_hover_format(hover_format)
+    hover = vp._get_hover(hover_format)
+    lines = [
+        shape.to_plotly_json() for shape in vp._lines(
+            effect_size_line,
+            effect_size_line_color,
+            effect_size_line_width,
+            genomewideline_value,
+            genomewideline_color,
+            genomewideline_width,
+        )
+    ]
+
+    # the rows of each contrast, in order of appearance of the contrasts
+    codes, contrasts = pd.factorize(dataframe[contrast])
+    order = np.argsort(codes, kind='stable')
+    bounds = np.concatenate(
+        [[0], np.cumsum(np.bincount(codes, minlength=len(contrasts)))]
+    )
+
+    n = len(contrasts)
+    if columns is None:
+        columns = int(np.ceil(np.sqrt(n)))
+    nrows = int(np.ceil(n / float(columns)))
+    grid = subplots.make_subplots(
+        rows=nrows,
+        cols=columns,
+        shared_xaxes=True,
+        shared_yaxes=True,
+        subplot_titles=[str(c) for c in contrasts],
+    )
+
+    data_to_plot = []
+    shapes = []
+    for k in range(n):
+        rows = order[bounds[k]:bounds[k + 1]]
+        # the subplots are numbered by row, from the top left one
+        axis = '' if k == 0 else str(k + 1)
+        is_highlighted = highlighted[rows]
+        for name, trace_rows, color in [
+                ('Point(s) of interest', rows[is_highlighted], highlight_color),
+                ('Dataset', rows[~is_highlighted], col),
+        ]:
+            data_to_plot.append(dict(
+                type='scattergl',
+                x=x[trace_rows],
+                y=y[trace_rows],
+                mode='markers',
+                marker=dict(color=color, size=point_size),
+                name=name,
+                legendgroup=name,
+                showlegend=k == 0,
+                xaxis='x' + axis,
+                yaxis='y' + axis,
+                **_take(hover, trace_rows)
+            ))
+        shapes.extend(
+            dict(line, xref='x' + axis, yref='y' + axis) for line in lines
+        )
+
+    # the layout of the grid is edited as a dict, and the figure is made
+    # (and validated) once, with all of the traces
+    layout = grid.layout.to_plotly_json()
+    for k in range(nrows * columns):
+        axis = '' if k == 0 else str(k + 1)
+        layout['xaxis' + axis].update(range=[-xlim, xlim], zeroline=False)
+        layout['yaxis' + axis]['zeroline'] = False
+        if k >= (nrows - 1) * columns:
+            layout['xaxis' + axis]['title'] = xlabel
+        if k % columns == 0:
+            layout['yaxis' + axis]['title'] = ylabel
+    layout.update(
+        title={'text': 'Volcano Plot',
+               'font': {'family': 'sans-serif', 'size': 20},
+               'x': 0.5,
+               'xanchor': 'right',
+               'yanchor': 'top'
+               },
+        hovermode='closest',
+        legend={'bgcolor': '#ebf1fa',
+                'yanchor': 'top',
+                'x': 1.01,
+                "font": {"family": "sans-serif"}
+                },
+        shapes=shapes,
+    )
+
+    fig = go.Figure(data=data_to_plot, layout=layout)
+    if kwargs:
+        fig.update_layout(**kwargs)
+    return fig
+
+
+def _effect_size_line(effect_size_line):
+    """Check `effect_size_line`, and return its default value if None."""
+    if effect_size_line is None:
+        effect_size_line = [-1, 1]
+
+    if not effect_size_line and not isinstance(effect_size_line, bool):
+        raise ValueError("If effect_size_line is a logical, it must be "
+                         "set to False")
+
+    if np.size(effect_size_line) > 2:
+        raise ValueError("The argument effect_size_line should be a "
+                         "vector or a list of maximum two components")
+
+    return effect_size_line
+
 
 class _VolcanoPlot():
 
+    # whether the 'Dataset' trace has all of the points, below the trace
+    # of the highlighted points, instead of only the other points
+    _full_dataset = False
+
     def __init__(
             self,
             x,
@@ -289,6 +513,18 @@ class _VolcanoPlot():
         self.annotationName = annotation
         self.logp = logp
 
+        # the values on the y axis are computed once, for all of the
+        # figures of this plot
+        self.yName = 'Y_VALUE'
+        if self.logp:
+            self.data[self.yName] = -np.log10(self.data[self.pName].values)
+        else:
+            self.data[self.yName] = self.data[self.pName].values
+        # hover information, generated on demand by _get_hover
+        self._hover_columns = None
+        self._hover = {}
+        self._extent = None
+
     def figure(
             self,
             xlabel=None,
@@ -303,6 +539,9 @@ class _VolcanoPlot():
             genomewideline_width=1,
             highlight=True,
             highlight_color='red',
+            density=False,
+            density_resolution=None,
+            hover_format='text',
             **kwargs
     ):
         """Return a figure object compatible with plotly.graph_objects.
@@ -337,6 +576,16 @@ class _VolcanoPlot():
     - highlight_color (string; default 'red'): Color of the data points
         highlighted because considered significant. Can be in any color
         format accepted by plotly.graph_objects.
+    - density (bool; default False): Whether to draw the points that are
+        neither past the genome-wide line nor past the effect size lines
+        as a heatmap of the number of points per bin.
+    - density_resolution (list; default [1000, 500]): The width and
+        height, in pixels, of the plotting area.
+    - hover_format (string; default 'text'): Whether the hover
+        information is sent as pre-formatted strings ('text'), as
+        `customdata` with a `hovertemplate` ('customdata'), or as the
+        row of each point, to be looked up with `hover_details`
+        ('lazy').
     - Additional keys (misc.): Arbitrary arguments can be passed to modify the
         Layout and styling of the graph. A full reference of acceptable args is
         available [here](https://plotly.com/python-api-reference/generated/plotly.graph_objects
@@ -361,29 +610,13 @@ class _VolcanoPlot():
         if xlabel is None:
             xlabel = self.xlabel
 
-        if effect_size_line is None:
-            effect_size_line = [-1, 1]
-
-        if not effect_size_line and not isinstance(effect_size_line, bool):
-            raise ValueError("If effect_size_line is a logical, it must be "
-                             "set to False")
-
-        if np.size(effect_size_line) > 2:
-            raise ValueError("The argument effect_size_line should be a "
-                             "vector or a list of maximum two components")
+        effect_size_line = _effect_size_line(effect_size_line)
+        _check_hover_format(hover_format)
 
         # Initialize plot
-        xmin = min(self.data[self.effectSize].values)
-        xmax = max(self.data[self.effectSize].values)
-        # Taking 105% of the max value of data for x axis range
-        xlim = 1.05 * np.max(np.abs([xmin, xmax]))
-
-        if self.logp:
-            ymin = min(-np.log10(self.data[self.pName].values))
-            ymax = max(-np.log10(self.data[self.pName].values))
-        else:
-            ymin = min(self.data[self.pName].values)
-            ymax = max(self.data[self.pName].values)
+        x = self.data[self.effectSize].values
+        y = self.data[self.yName].values
+        xlim, ymin, ymax = self._axis_ranges()
 
         if col is None:
             col = 'black'
@@ -415,7 +648,84 @@ class _VolcanoPlot():
         layout.update(**kwargs)
 
         data_to_plot = []  # To contain the data traces
-        tmp = pd.DataFrame()  # Empty DataFrame to contain the highlighted data
+
+        # The points are split between the highlighted and the other ones
+        # with a boolean mask, and the traces take the column arrays at
+        # the rows of each set
+        highlighted, dense = self._masks(
+            effect_size_line, genomewideline_value, highlight, density
+        )
+        hover = self._get_hover(hover_format)
+
+        if dense is not None:
+            data_to_plot.append(go.Heatmap(**self._density(
+                dense, density_resolution, genomewideline_value
+            )))
+            layout.meta = dict(
+                downsampled_points=int(np.count_nonzero(dense))
+            )
+
+        highlight_trace = None
+        rows = np.flatnonzero(highlighted)
+        if len(rows) or self._full_dataset:
+            highlight_trace = go.Scattergl(
+                x=x[rows],
+                y=y[rows],
+                mode='markers',
+                marker=dict(
+                    color=highlight_color,
+                    size=point_size),
+                name='Point(s) of interest',
+                **_take(hover, rows)
+            )
+            if not self._full_dataset:
+                data_to_plot.append(highlight_trace)
+
+        # The other points
+        others = np.ones(len(x), dtype=bool)
+        if not self._full_dataset:
+            others &= ~highlighted
+        if dense is not None:
+            others &= ~dense
+        rows = np.flatnonzero(others)
+
+        data_to_plot.append(
+            go.Scattergl(
+                x=x[rows],
+                y=y[rows],
+                mode='markers',
+                marker={
+                    'color': col,
+                    'size': point_size,
+                    # 'name': "chr%i" % self.data[self.chrName].unique()
+                },
+                name='Dataset',
+                **_take(hover, rows)
+            )
+        )
+
+        if self._full_dataset:
+            # the highlighted points are drawn over the dataset
+            data_to_plot.append(highlight_trace)
+
+        layout.shapes = self._lines(
+            effect_size_line,
+            effect_size_line_color,
+            effect_size_line_width,
+            genomewideline_value,
+            genomewideline_color,
+            genomewideline_width,
+        )
+
+        return go.Figure(data=data_to_plot, layout=layout)
+
+    def _masks(self, effect_size_line, genomewideline_value, highlight,
+               density):
+        """Return the boolean masks of the highlighted points and of the
+        points binned into the density heatmap (or None)."""
+        x = self.data[self.effectSize].values
+        y = self.data[self.yName].values
+        highlighted = np.zeros(len(x), dtype=bool)
 
         if highlight:
             if not isinstance(highlight, bool):
@@ -430,72 +740,108 @@ class _VolcanoPlot():
                         "The genomewideline_value you entered is not a "
                         "positive value, or False, you cannot set highlight "
                         "to True in that case.")
-                tmp = self.data
+                highlighted[:] = True
 
                 # Sort the p-values (or -log10(p-values) above the line
                 if genomewideline_value:
-                    if self.logp:
-                        tmp = tmp.loc[-np.log10(tmp[self.pName])
-                                      > genomewideline_value]
-                    else:
-                        tmp = tmp.loc[tmp[self.pName] > genomewideline_value]
+                    highlighted &= y > genomewideline_value
 
                 # Sort the effect size in large positive and large negative
                 if effect_size_line:
-                    lp = tmp.loc[tmp[self.effectSize] > max(effect_size_line)]
-                    ln = tmp.loc[tmp[self.effectSize] < min(effect_size_line)]
-                    tmp = pd.concat([lp, ln])
-
-                highlight_hover_text = _get_hover_text(
-                    tmp,
-                    snpname=self.snpName,
-                    genename=self.geneName,
-                    annotationname=self.annotationName
-                )
+                    highlighted &= (x > max(effect_size_line)) | \
+                        (x < min(effect_size_line))
 
-                if not tmp.empty:
-                    data_to_plot.append(
-                        go.Scattergl(
-                            x=tmp[self.effectSize],
-                            y=-np.log10(tmp[self.pName].values) if self.logp
-                            else tmp[self.pName].values,
-                            mode='markers',
-                            text=highlight_hover_text,
-                            marker=dict(
-                                color=highlight_color,
-                                size=point_size),
-                            name='Point(s) of interest'
-                        )
-                    )
+        dense = None
+        if density:
+            # the points that are not past any of the lines are binned
+            dense = ~highlighted
+            if genomewideline_value:
+                dense &= y <= genomewideline_value
+            if effect_size_line:
+                dense &= (x <= max(effect_size_line)) & \
+                    (x >= min(effect_size_line))
 
-        # Remove the highlighted data from the DataFrame if not empty
-        if tmp.empty:
-            data = self.data
-        else:
-            data = self.data.drop(self.data.index[tmp.index])
+        return highlighted, dense
 
-        hover_text = _get_hover_text(
-            data,
-            snpname=self.snpName,
-            genename=self.geneName,
-            annotationname=self.annotationName
+    def _density(self, dense, density_resolution, genomewideline_value):
+        """Return the arguments of the density heatmap of the points of
+        the `dense` mask."""
+        x = self.data[self.effectSize].values
+        y = self.data[self.yName].values
+        xlim, _, _ = self._axis_ranges()
+        if density_resolution is None:
+            density_resolution = [1000, 500]
+        # the heatmap is always drawn (threshold_patch updates it), even
+        # without finite y values to bin, e.g., if all of the p-values are 0
+        finite = y[np.isfinite(y)]
+        ymin = finite.min() if len(finite) else 0
+        ymax = genomewideline_value or (finite.max() if len(finite) else 1)
+        if ymin >= ymax:
+            ymin = ymax - 1
+        return _get_density(
+            x[dense],
+            y[dense],
+            resolution=density_resolution,
+            xrange=[-xlim, xlim],
+            yrange=[ymin, ymax],
         )
 
-        data_to_plot.append(
-            go.Scattergl(
-                x=data[self.effectSize].values,
-                y=-np.log10(data[self.pName].values) if self.logp
-                else data[self.pName].values,
-                mode='markers',
-                marker={
-                    'color': col,
-                    'size': point_size,
-                    # 'name': "chr%i" % self.data[self.chrName].unique()
-                },
-                text=hover_text,
-                name='Dataset'
+    def _axis_ranges(self):
+        """Return the half-width of the x axis, and the smallest and
+        largest y values, which are computed once."""
+        if self._extent is None:
+            x = self.data[self.effectSize].values
+            y = self.data[self.yName].values
+            # Taking 105% of the max value of data for x axis range
+            xlim = 1.05 * max(abs(x.min()), abs(x.max()))
+            self._extent = (xlim, y.min(), y.max())
+        return self._extent
+
+    def _get_hover(self, hover_format='text'):
+        """Return the hover information of all of the points, as the
+        keyword arguments of a trace, which is generated once per format
+        (see the `figure` method)."""
+        if hover_format not in self._hover:
+            self._hover[hover_format] = \
+                self._get_hover_columns().trace_arrays(hover_format)
+        return self._hover[hover_format]
+
+    def _get_hover_columns(self):
+        """Return the hover columns, stored as categorical codes the first
+        time that they are needed."""
+        if self._hover_columns is None:
+            self._hover_columns = _HoverColumns(
+                self.data,
+                snpname=self.snpName,
+                genename=self.geneName,
+                annotationname=self.annotationName
             )
-        )
+        return self._hover_columns
+
+    def hover_details(self, hover_data):
+        """Return the SNP, gene and annotation of the hovered points of a
+        figure with the 'lazy' hover format.
+
+        Keyword arguments:
+        - hover_data (dict; required): The `hoverData` (or `clickData`)
+        of the graph.
+
+        Returns:
+        - A list with one dict per point, with the value of each hover
+        column."""
+        return self._get_hover_columns().details(_lazy_hover_rows(hover_data))
+
+    def _lines(
+            self,
+            effect_size_line,
+            effect_size_line_color,
+            effect_size_line_width,
+            genomewideline_value,
+            genomewideline_color,
+            genomewideline_width,
+    ):
+        """Return the shapes of the effect size and genome-wide lines."""
+        xlim, ymin, ymax = self._axis_ranges()
 
         # Draw the effect size lines
         if effect_size_line:
@@ -540,6 +886,142 @@ class _VolcanoPlot():
             )
             lines.append(genomewideline)
 
-        layout.shapes = lines
+        return lines
 
-        return go.Figure(data=data_to_plot, layout=layout)
+
+class PreparedVolcanoPlot(_VolcanoPlot):
+    """The data of a VolcanoPlot, prepared once to plot it many times.
+
+The columns are validated, and the plotted y values and the axis ranges
+are computed when the object is created; the hover text is generated the
+first time that it is needed, and then kept. Pass the object to
+VolcanoPlot instead of the dataframe.
+
+Unlike the figures of VolcanoPlot with a dataframe, in which the
+highlighted points come first and the 'Dataset' trace only has the other
+points, in the figures of a PreparedVolcanoPlot the 'Dataset' trace
+comes first and has all of the points, and the highlighted points are
+drawn again over it, in a second trace (so that they show up in both
+traces on hover, and in both legend entries). This is so that a new
+threshold does not change the dataset: in a Dash callback that moves
+the effect size or genome-wide lines, `threshold_patch` returns an
+update of the highlighted points and of the lines only, instead of the
+whole figure (`threshold_patch` requires dash>=2.9, which added
+`dash.Patch`). The object can be pickled, e.g., to cache it per dataset.
+
+Keyword arguments:
+
+- dataframe (dataframe; required): The data, as for VolcanoPlot.
+- effect_size, p, snp, gene, annotation, logp: The column arguments of
+    VolcanoPlot.
+
+Example:
+
+    prepared = PreparedVolcanoPlot(df)
+    fig = VolcanoPlot(prepared, genomewideline_value=4)
+    # then, in a callback that changes the thresholds
+    patch = prepared.threshold_patch(genomewideline_value=6)
+    """
+
+    _full_dataset = True
+
+    def __init__(
+            self,
+            dataframe,
+            effect_size='EFFECTSIZE',
+            p='P',
+            snp='SNP',
+            gene='GENE',
+            annotation=None,
+            logp=True
+    ):
+        super().__init__(
+            dataframe,
+            effect_size=effect_size,
+            p=p,
+            snp=snp,
+            gene=gene,
+            annotation=annotation,
+            logp=logp
+        )
+        self._axis_ranges()
+
+    def threshold_patch(
+            self,
+            effect_size_line=None,
+            effect_size_line_color='grey',
+            effect_size_line_width=0.5,
+            genomewideline_value=-np.log10(5e-8),
+            genomewideline_color='grey',
+            genomewideline_width=1,
+            highlight=True,
+            density=False,
+            density_resolution=None,
+            hover_format='text',
+    ):
+        """Return a dash Patch which moves the lines of a VolcanoPlot of
+        this object to new thresholds.
+
+        Only the highlighted points and the shapes of the lines are sent
+        (with `density`, the heatmap and the points outside of it too,
+        since the thresholds change which points are binned). The figure
+        to update must have been made with the same `density` and
+        `hover_format`. Requires dash>=2.9.
+
+        Keyword arguments:
+        - The threshold, line and hover arguments of VolcanoPlot.
+
+        Returns:
+        - A dash.Patch, to return from a callback whose output is the
+        `figure` of the graph."""
+        try:
+            from dash import Patch
+        except ImportError:
+            raise ImportError(
+                "threshold_patch requires dash>=2.9 (for dash.Patch); "
+                "upgrade dash, or make a new figure with VolcanoPlot"
+            ) from None
+
+        effect_size_line = _effect_size_line(effect_size_line)
+        highlighted, dense = self._masks(
+            effect_size_line, genomewideline_value, highlight, density
+        )
+        hover = self._get_hover(hover_format)
+
+        patch = Patch()
+        trace = 0
+        if dense is not None:
+            heatmap = self._density(
+                dense, density_resolution, genomewideline_value
+            )
+            for key in ['x', 'y', 'z']:
+                patch['data'][0][key] = heatmap[key]
+            patch['layout']['meta'] = dict(
+                downsampled_points=int(np.count_nonzero(dense))
+            )
+            trace = 1
+            self._patch_points(patch, trace, np.flatnonzero(~dense), hover)
+
+        self._patch_points(
+            patch, trace + 1, np.flatnonzero(highlighted), hover
+        )
+
+        patch['layout']['shapes'] = [
+            shape.to_plotly_json() for shape in self._lines(
+                effect_size_line,
+                effect_size_line_color,
+                effect_size_line_width,
+                genomewideline_value,
+                genomewideline_color,
+                genomewideline_width,
+            )
+        ]
+        return patch
+
+    def _patch_points(self, patch, trace, rows, hover):
+        """Set the points of a trace of `patch` to the given rows."""
+        patch['data'][trace]['x'] = self.data[self.effectSize].values[rows]
+        patch['data'][trace]['y'] = self.data[self.yName].values[rows]
+        for key, value in _take(hover, rows).items():
+            if isinstance(value, np.ndarray):
+                patch['data'][trace][key] = value
@@ -1,5 +1,38 @@
-def _get_hover_text(df, snpname=None, genename=None, annotationname=None):
-    """Format the hover text used in Manhattan and Volcano plots.
+import base64
+
+import numpy as np
+import pandas as pd
+
+# size, in pixels, of the bins of the density heatmaps of Manhattan and
+# Volcano plots
+DENSITY_BIN_PIXELS = 4
+
+
+# formats of the hover information of Manhattan and Volcano plots
+HOVER_FORMATS = ['text', 'customdata', 'lazy']
+
+
+def _check_hover_format(hover_format):
+    """Raise a ValueError if `hover_format` is not one of HOVER_FORMATS."""
+    if hover_format not in HOVER_FORMATS:
+        raise ValueError(
+            "hover_format should be either 'text', 'customdata' or 'lazy'"
+        )
+
+
+class _HoverColumns:
+    """The hover information of the points of Manhattan and Volcano plots.
+
+    Each hover column (SNP, gene and annotation) is stored as categorical
+    codes into its distinct values, which are formatted once, however
+    many points share them. The hover information can be sent to the
+    browser as pre-formatted text ('text'), as the values of the columns
+    in `customdata`, formatted by a `hovertemplate` ('customdata'), or
+    only as the row of each point in `customdata` ('lazy'), whose details
+    are looked up on the server (e.g., in a `hoverData` callback) with
+    `details`, so that the size of the figure does not depend on the
+    length of the labels.
+
     :param (dataFrame) df: A pandas dataframe.
     :param (string) snpname: A string denoting the column name for the SNP
     names (e.g., rs number). More generally, this column could be anything
@@ -16,18 +49,185 @@ def _get_hover_text(df, snpname=None, genename=None, annotationname=None):
     want to include in the plot (e.g., zscore, effect size, minor allele
     frequency).
     """
-    hover_text = ''
-    if snpname is not None and snpname in df.columns:
-        hover_text = 'SNP: ' + df[snpname].astype(str)
 
-    if genename is not None and genename in df.columns:
-        hover_text = hover_text \
-                     + '<br>GENE: ' \
-                     + df[genename].astype(str)
+    def __init__(self, df, snpname=None, genename=None, annotationname=None):
+        self.size = len(df)
+        self.names = []
+        self.prefixes = []
+        self.codes = []
+        self.values = []
+        for name, prefix in [
+                (snpname, 'SNP: '), (genename, 'GENE: '), (annotationname, '')
+        ]:
+            if name is None or name not in df.columns:
+                continue
+            codes, values = pd.factorize(df[name])
+            values = np.asarray(values.astype(object))
+            if (codes < 0).any():
+                # the missing values are a value of their own
+                codes[codes < 0] = len(values)
+                values = np.append(values, np.nan)
+            self.names.append(name)
+            self.prefixes.append(prefix)
+            self.codes.append(codes.astype(np.min_scalar_type(len(values))))
+            self.values.append(values)
+
+    def trace_arrays(self, hover_format='text'):
+        """Return the hover information of all of the points, as keyword
+        arguments of a trace.
+
+        :param (string) hover_format: 'text', 'customdata' or 'lazy'.
+        :returns (dict): Either the 'text', or the 'customdata' and
+        'hovertemplate' of the points.
+        """
+        _check_hover_format(hover_format)
+        if hover_format == 'text':
+            return dict(text=self.text())
+        if hover_format == 'lazy':
+            return dict(
+                customdata=np.arange(self.size, dtype=np.int32),
+                hovertemplate='(%{x}, %{y})',
+            )
+
+        template = ['(%{x}, %{y})']
+        customdata = None
+        if len(self.names) == 1:
+            # a flat array, which is serialized faster than one row per point
+            template.append('%s%%{customdata}' % self.prefixes[0])
+            customdata = self.values[0][self.codes[0]]
+        elif self.names:
+            for i, prefix in enumerate(self.prefixes):
+                template.append('%s%%{customdata[%i]}' % (prefix, i))
+            # the rows share the objects of the distinct values
+            customdata = np.empty((self.size, len(self.names)), dtype=object)
+            for i, (codes, values) in enumerate(zip(self.codes, self.values)):
+                customdata[:, i] = values[codes]
+        return dict(customdata=customdata, hovertemplate='<br>'.join(template))
+
+    def text(self):
+        """Return the hover text of all of the points, or '' if there is no
+        hover column."""
+        text = ''
+        for i, codes in enumerate(self.codes):
+            labels = self._labels(i)
+            text = labels[codes] if i == 0 else text + '<br>' + labels[codes]
+        return text
+
+    def details(self, rows):
+        """Return the hover values of the given rows.
+
+        :param (list) rows: The rows, e.g., the `customdata` of the points
+        of the `hoverData` of a graph with the 'lazy' hover format.
+        :returns (list): One dict per row, with the value of each hover
+        column.
+        """
+        return [
+            {
+                name: values[codes[row]]
+                for name, codes, values in zip(
+                    self.names, self.codes, self.values
+                )
+            }
+            for row in rows
+        ]
+
+    def _labels(self, i):
+        """Return the formatted distinct values of the i-th hover column
+        (a missing value is formatted as 'nan')."""
+        prefix = self.prefixes[i]
+        return np.array([prefix + str(v) for v in self.values[i]], dtype=object)
+
+
+def _take(trace_arrays, rows):
+    """Return the keyword arguments of a trace, with the arrays (one
+    element per point) taken at the given rows."""
+    return {
+        k: v[rows] if isinstance(v, np.ndarray) else v
+        for k, v in trace_arrays.items()
+    }
+
+
+def _lazy_hover_rows(hover_data):
+    """Return the rows of the points of the `hoverData` (or `clickData`)
+    of a graph with the 'lazy' hover format."""
+    if not hover_data:
+        return []
+    return [
+        point['customdata'] for point in hover_data.get('points', [])
+        if isinstance(point.get('customdata'), int)
+    ]
+
+
+def _get_density(x, y, resolution, xrange, yrange):
+    """Bin points for the density heatmap of Manhattan and Volcano plots.
+
+    The heatmap has one bin per `DENSITY_BIN_PIXELS` pixels along each
+    axis, so that its size does not depend on the number of points.
+
+    :param (ndarray) x: The x coordinates of the points.
+    :param (ndarray) y: The y coordinates of the points.
+    :param (list) resolution: The width and height, in pixels, of the
+    plotting area.
+    :param (list) xrange: The range of the x axis.
+    :param (list) yrange: The range of the y axis.
+    :returns (dict): The arguments of go.Heatmap: the centers of the bins
+    along x and y, the number of points in each bin (z; NaN for the empty
+    bins) and their style.
+    """
+    finite = np.isfinite(x) & np.isfinite(y)
+    bins = [max(1, int(n) // DENSITY_BIN_PIXELS) for n in resolution]
+    counts, xedges, yedges = np.histogram2d(
+        x[finite], y[finite], bins=bins, range=[xrange, yrange]
+    )
+    z = counts.T.astype(np.float32)
+    z[z == 0] = np.nan
+    return dict(
+        x=(xedges[:-1] + xedges[1:]) / 2,
+        y=(yedges[:-1] + yedges[1:]) / 2,
+        z=z,
+        name='Density',
+        colorscale=[[0, 'rgb(220, 220, 220)'], [1, 'rgb(0, 0, 0)']],
+        showscale=False,
+        hovertemplate='(%{x}, %{y})<br>Points: %{z}<extra></extra>',
+    )
+
+
+def _encode_typed_array(values, dtype="f4"):
+    """Encode an array in the typed array format of plotly.js (>= 2.28).
+
+    Compared to a list of numbers, the base64-encoded binary data is
+    several times smaller in JSON and faster to serialize.
+
+    :param (array-like) values: The values to encode.
+    :param (string) dtype: The dtype of the encoded values (e.g., 'f4' for
+    float32 or 'f8' for float64).
+    """
+    values = np.ascontiguousarray(values, dtype=dtype)
+    spec = {
+        "dtype": values.dtype.str.lstrip("<|="),
+        "bdata": base64.b64encode(values.tobytes()).decode("ascii"),
+    }
+    if values.ndim > 1:
+        spec["shape"] = ", ".join(str(n) for n in values.shape)
+    return spec
+
 
-    if annotationname is not None and annotationname in df.columns:
-        hover_text = hover_text \
-                     + '<br>' \
-                     + df[annotationname].astype(str)
+def _decode_typed_array(value):
+    """Decode an array that may be in the typed array format of plotly.js.
 
-    return hover_text
+    Other values (e.g., lists, in which NaN values were turned into None
+    during serialization) are converted to an array of floats.
+
+    :param value: A typed array specification, an array or a list.
+    """
+    if isinstance(value, dict) and "bdata" in value and "dtype" in value:
+        values = np.frombuffer(
+            base64.b64decode(value["bdata"]), dtype=np.dtype(value["dtype"])
+        )
+        if "shape" in value:
+            shape = value["shape"]
+            if isinstance(shape, str):
+                shape = [int(n) for n in shape.split(",")]
+            values = values.reshape(shape)
+        return values
+    return np.array(value, dtype=float)
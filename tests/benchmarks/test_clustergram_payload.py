@@ -0,0 +1,78 @@
+"""Benchmark the size and serialization time of Clustergram figures, with
+and without typed arrays, on the datasets of the dash-clustergram demo.
+
+Run with `pytest tests/benchmarks/test_clustergram_payload.py` (requires
+pytest-benchmark); the payload sizes are recorded in the `extra_info` of
+each benchmark.
+"""
+import json
+import os
+
+import pandas as pd
+import plotly
+import pytest
+
+from dash_bio import Clustergram
+from dash_bio.component_factory.utils import _decode_typed_array
+
+pytest.importorskip('pytest_benchmark')
+
+DATAPATH = os.path.join(
+    os.path.dirname(__file__), '..', 'dashbio_demos', 'dash-clustergram', 'data'
+)
+
+DATASETS = {
+    'iris': ('iris.tsv', None),
+    'mtcars': ('mtcars.tsv', None),
+    # only the first genes, so that the exact clustering fits in memory
+    'expression': ('E-GEOD-38612-query-results.tpms.tsv', 5000),
+}
+
+
+def _load(name):
+    filename, nrows = DATASETS[name]
+    df = pd.read_csv(
+        os.path.join(DATAPATH, filename), sep='\t', comment='#', nrows=nrows
+    )
+    return df.select_dtypes('number').fillna(0).values
+
+
+def _as_list(value):
+    if isinstance(value, dict) and 'bdata' in value:
+        value = _decode_typed_array(value)
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+
+def _data_json(fig, typed_arrays):
+    data = fig.to_plotly_json()['data']
+    if not typed_arrays:
+        # plain lists of numbers, as sent by plotly < 6
+        data = [{k: _as_list(v) for k, v in t.items()} for t in data]
+    return json.dumps(data, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+@pytest.fixture(scope='module', params=sorted(DATASETS))
+def dataset(request):
+    return request.param, _load(request.param)
+
+
+@pytest.mark.parametrize('typed_arrays', [False, True])
+def test_clustergram_to_json(benchmark, dataset, typed_arrays):
+    name, data = dataset
+    fig = Clustergram(data, typed_arrays=typed_arrays)
+
+    payload = benchmark(_data_json, fig, typed_arrays)
+
+    benchmark.extra_info['dataset'] = name
+    benchmark.extra_info['shape'] = list(data.shape)
+    benchmark.extra_info['payload_bytes'] = len(payload)
+
+
+def test_typed_arrays_payload_size(dataset):
+    _, data = dataset
+    lists = _data_json(Clustergram(data), False)
+    typed = _data_json(Clustergram(data, typed_arrays=True), True)
+
+    assert len(typed) * 2 < len(lists)
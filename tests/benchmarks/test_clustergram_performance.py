@@ -0,0 +1,161 @@
+"""Benchmark the time and memory of Clustergram, phase by phase.
+
+Each phase of the figure construction has its own benchmark, so that a
+regression in one of them is visible on its own:
+
+- 'distance': the condensed pairwise distances between the rows;
+- 'linkage': the hierarchical clustering of these distances (or, above
+  `BIN_SIZE` rows, the bounded-memory clustering with `row_bin_size`,
+  which computes the distances itself);
+- 'dendrogram': the dendrogram traces of the linkage matrix;
+- 'figure': the figure assembly, with precomputed linkage matrices or
+  with the `computed_traces` of a previous Clustergram;
+- 'clustergram': the whole Clustergram, across `cluster` modes, metrics
+  and `optimal_leaf_order`.
+
+Run with `pytest tests/benchmarks/test_clustergram_performance.py`
+(requires pytest-benchmark); use, e.g., `-k "not 50000"` to leave out the
+largest matrices. The peak memory of each benchmarked call, as measured
+by tracemalloc, is recorded in the `extra_info` of each benchmark.
+"""
+import tracemalloc
+
+import numpy as np
+import pytest
+import scipy.cluster.hierarchy as sch
+import scipy.spatial as scs
+
+from dash_bio import Clustergram, clustergram_linkage
+from dash_bio.component_factory._dendrogram import _dendrogram_traces
+from dash_bio.component_factory._linkage import _binned_linkage, _distances
+
+pytest.importorskip('pytest_benchmark')
+
+SIZES = [100, 1000, 5000, 20000, 50000]
+COLUMNS = 50
+# above this number of rows, the rows are clustered with row_bin_size
+BIN_SIZE = 5000
+METRICS = ['euclidean', 'cityblock', 'correlation', 'cosine']
+CLUSTER_MODES = ['row', 'col', 'all']
+
+
+def _data(rows, cols=COLUMNS, seed=0):
+    """Return a matrix of rows drawn around a few centers."""
+    rs = np.random.RandomState(seed)
+    centers = rs.normal(scale=3, size=(8, cols))
+    return centers[rs.randint(8, size=rows)] + rs.normal(size=(rows, cols))
+
+
+def _peak_memory(fun, *args, **kwargs):
+    """Return the peak memory, in bytes, allocated while calling `fun`."""
+    tracemalloc.start()
+    try:
+        fun(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _run(benchmark, phase, rows, fun, *args, **kwargs):
+    """Benchmark `fun` and record the phase, size and peak memory."""
+    benchmark.extra_info['phase'] = phase
+    benchmark.extra_info['rows'] = rows
+    benchmark.extra_info['peak_bytes'] = _peak_memory(fun, *args, **kwargs)
+    if rows > BIN_SIZE:
+        # the large matrices take seconds per call
+        return benchmark.pedantic(fun, args, kwargs, rounds=3, iterations=1)
+    return benchmark(fun, *args, **kwargs)
+
+
+def _row_linkage(data, metric='euclidean', optimal_leaf_order=False):
+    if data.shape[0] > BIN_SIZE:
+        return _binned_linkage(
+            data, metric, sch.linkage, optimal_ordering=optimal_leaf_order,
+            bin_size=BIN_SIZE
+        )
+    d = scs.distance.pdist(data, metric=metric)
+    return sch.linkage(d, 'complete', optimal_ordering=optimal_leaf_order)
+
+
+@pytest.fixture(scope='module', params=SIZES)
+def rows(request):
+    return request.param
+
+
+@pytest.fixture(scope='module')
+def data(rows):
+    return _data(rows)
+
+
+@pytest.fixture(scope='module')
+def linkage(data):
+    return clustergram_linkage(
+        data, row_bin_size=BIN_SIZE if data.shape[0] > BIN_SIZE else None
+    )
+
+
+def test_distance(benchmark, rows, data):
+    if rows > BIN_SIZE:
+        pytest.skip('the distances are computed by the binned linkage')
+    _run(
+        benchmark, 'distance', rows,
+        _distances, data, 'euclidean', scs.distance.pdist
+    )
+
+
+def test_linkage(benchmark, rows, data):
+    if rows > BIN_SIZE:
+        _run(
+            benchmark, 'linkage', rows,
+            _binned_linkage, data, 'euclidean', sch.linkage, bin_size=BIN_SIZE
+        )
+    else:
+        d = scs.distance.pdist(data)
+        _run(benchmark, 'linkage', rows, sch.linkage, d, 'complete')
+
+
+def test_dendrogram_traces(benchmark, rows, linkage):
+    _run(
+        benchmark, 'dendrogram', rows,
+        _dendrogram_traces, linkage['row_linkage'], orientation='right'
+    )
+
+
+def test_figure(benchmark, rows, data, linkage):
+    _run(benchmark, 'figure', rows, Clustergram, data, **linkage)
+
+
+def test_figure_computed_traces(benchmark, rows, data, linkage):
+    _, computed_traces = Clustergram(
+        data, return_computed_traces=True, **linkage
+    )
+    _run(
+        benchmark, 'figure', rows,
+        Clustergram, data, computed_traces=computed_traces
+    )
+
+
+@pytest.mark.parametrize('metric', METRICS)
+@pytest.mark.parametrize('optimal_leaf_order', [False, True])
+def test_linkage_options(benchmark, metric, optimal_leaf_order):
+    data = _data(1000)
+    benchmark.extra_info['metric'] = metric
+    benchmark.extra_info['optimal_leaf_order'] = optimal_leaf_order
+    _run(
+        benchmark, 'linkage', 1000,
+        _row_linkage, data, metric=metric,
+        optimal_leaf_order=optimal_leaf_order
+    )
+
+
+@pytest.mark.parametrize('cluster', CLUSTER_MODES)
+@pytest.mark.parametrize('optimal_leaf_order', [False, True])
+def test_clustergram(benchmark, cluster, optimal_leaf_order):
+    data = _data(1000)
+    benchmark.extra_info['cluster'] = cluster
+    benchmark.extra_info['optimal_leaf_order'] = optimal_leaf_order
+    _run(
+        benchmark, 'clustergram', 1000,
+        Clustergram, data, cluster=cluster,
+        optimal_leaf_order=optimal_leaf_order
+    )
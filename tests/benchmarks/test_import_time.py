@@ -0,0 +1,71 @@
+"""Benchmark the time of `import dash_bio`, which is paid at the start of
+each worker of a Dash app (e.g., gunicorn workers or serverless cold
+starts).
+
+The component factories (Clustergram, ManhattanPlot, VolcanoPlot, ...)
+are only imported when first used, so that importing dash_bio does not
+import numpy, pandas, scipy, scikit-learn or plotly.figure_factory.
+
+Run with `pytest tests/benchmarks/test_import_time.py` (requires
+pytest-benchmark); each import runs in a new interpreter, and the
+import times of dash and dash_bio (which includes dash), as reported by
+`python -X importtime`, are recorded in the `extra_info` of the benchmark.
+"""
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+# modules that importing dash_bio should not import
+HEAVY_MODULES = [
+    'numpy', 'pandas', 'scipy', 'sklearn', 'plotly.figure_factory'
+]
+
+
+def _run_python(code, *options):
+    return subprocess.run(
+        [sys.executable] + list(options) + ['-c', code],
+        check=True, capture_output=True, text=True
+    )
+
+
+def _import_times(stderr):
+    """Return the cumulative import time, in seconds, of each module in the
+    output of `python -X importtime`."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_lazy_imports():
+    modules = _run_python(
+        'import sys, dash_bio; '
+        'print(" ".join(m for m in %r if m in sys.modules))' % HEAVY_MODULES
+    ).stdout.split()
+    assert modules == []
+
+
+def test_lazy_component_factories():
+    output = _run_python(
+        'import sys, dash_bio; '
+        'print(dash_bio.Clustergram.__module__, "scipy" in sys.modules)'
+    ).stdout
+    assert output.split() == ['dash_bio.component_factory._clustergram', 'True']
+
+
+def test_import_time(benchmark):
+    times = _import_times(
+        _run_python('import dash_bio', '-X', 'importtime').stderr
+    )
+    benchmark.extra_info['dash_seconds'] = times.get('dash')
+    benchmark.extra_info['dash_bio_seconds'] = times.get('dash_bio')
+    benchmark.pedantic(
+        _run_python, ('import dash_bio',), rounds=5, iterations=1
+    )
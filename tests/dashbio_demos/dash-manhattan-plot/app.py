@@ -22,8 +22,11 @@ assert df['CHR'].max() == n_chr
 DATASET = df.groupby('CHR').apply(lambda u: u.head(50))
 DATASET = DATASET.droplevel('CHR').reset_index(drop=True)
 
+# Prepare the data once, so that the callbacks only rebuild the traces
+PREPARED = dash_bio.PreparedManhattanPlot(DATASET)
+
 # Feed the data to a function which creates a Manhattan Plot figure
-fig = dash_bio.ManhattanPlot(DATASET)
+fig = dash_bio.ManhattanPlot(PREPARED)
 
 
 def description():
@@ -139,7 +142,7 @@ def callbacks(_app):
     def update_graph(slider_genome, slider_indic):
         """update the data sets upon change the genomewideline value"""
         return dash_bio.ManhattanPlot(
-            DATASET,
+            PREPARED,
             genomewideline_value=float(slider_genome),
             suggestiveline_value=float(slider_indic),
         )
@@ -4,6 +4,7 @@ import os
 import pandas as pd
 import numpy as np
 
+import dash
 import dash_html_components as html
 import dash_core_components as dcc
 from dash.dependencies import Input, Output, State
@@ -42,6 +43,20 @@ DATASETS = {
 for dataset in DATASETS:
     DATASETS[dataset]['dataframe'] = pd.read_csv(
         DATASETS[dataset]['datafile'], comment='#')
+    # Prepare the data once, so that moving the lines only updates the
+    # highlighted points
+    DATASETS[dataset]['prepared'] = dash_bio.PreparedVolcanoPlot(
+        DATASETS[dataset]['dataframe'],
+        **DATASETS[dataset]['dataprops']
+    )
+
+
+def highlighted_x(fig):
+    """Return the effect sizes of the highlighted points of the figure."""
+    for trace in fig['data']:
+        if trace.get('name') == 'Point(s) of interest':
+            return np.array(trace['x'])
+    return np.array([])
 
 
 def description():
@@ -272,12 +287,23 @@ def callbacks(_app):
         u_lim = effect_lims[1]
         if 'hex' in color:
             color = color.get('hex', 'red')
-        return dash_bio.VolcanoPlot(
-            DATASETS[datadset_id]['dataframe'],
+        prepared = DATASETS[datadset_id]['prepared']
+        thresholds = dict(
             genomewideline_value=float(genomic_line),
-            effect_size_line=[float(l_lim), float(u_lim)],
+            effect_size_line=[float(l_lim), float(u_lim)]
+        )
+        triggered = set(
+            t['prop_id'].split('.')[0] for t in dash.callback_context.triggered
+        )
+        if triggered <= {'vp-bound-val', 'vp-genomic-line-val'} and \
+                hasattr(dash, 'Patch'):
+            # only the lines moved: the dataset is not sent again (with
+            # dash>=2.9; older versions get the whole figure)
+            return prepared.threshold_patch(**thresholds)
+        return dash_bio.VolcanoPlot(
+            prepared,
             highlight_color=color,
-            **DATASETS[datadset_id]['dataprops']
+            **thresholds
         )
 
     @_app.callback(
@@ -298,11 +324,8 @@ def callbacks(_app):
     def update_upper_right_number(fig, bounds):
         """Update the number of data points in the upper right corner."""
         u_lim = bounds[1]
-        number = 0
-        if len(fig['data']) > 1:
-            x = np.array(fig['data'][0]['x'])
-            idx = x > float(u_lim)
-            number = len(x[idx])
+        x = highlighted_x(fig)
+        number = np.count_nonzero(x > float(u_lim))
         return number
 
     @_app.callback(
@@ -313,11 +336,8 @@ def callbacks(_app):
     def update_upper_left_number(fig, bounds):
         """Update the number of data points in the upper left corner."""
         l_lim = bounds[0]
-        number = 0
-        if len(fig['data']) > 1:
-            x = np.array(fig['data'][0]['x'])
-            idx = x < float(l_lim)
-            number = len(x[idx])
+        x = highlighted_x(fig)
+        number = np.count_nonzero(x < float(l_lim))
         return number
 
     # Callbacks for integration test purposes
@@ -331,11 +351,8 @@ def callbacks(_app):
         for testing purposes.
         """
         l_lim = bounds[0]
-        number = 0
-        if len(fig['data']) > 1:
-            x = np.array(fig['data'][0]['x'])
-            idx = x < float(l_lim)
-            number = len(x[idx])
+        x = highlighted_x(fig)
+        number = np.count_nonzero(x < float(l_lim))
         return str(number)
 
     @_app.callback(
@@ -356,11 +373,8 @@ def callbacks(_app):
         for testing purposes.
         """
         u_lim = bounds[1]
-        number = 0
-        if len(fig['data']) > 1:
-            x = np.array(fig['data'][0]['x'])
-            idx = x > float(u_lim)
-            number = len(x[idx])
+        x = highlighted_x(fig)
+        number = np.count_nonzero(x > float(u_lim))
         return str(number)
 
     @_app.callback(
@@ -30,7 +30,7 @@ def test_dbcl001_colorscale(dash_duo):
         test_prop_name="color_map",
         test_prop_value=json.dumps([[0, "blue"], [0.5, "yellow"], [1, "pink"]]),
         prop_value_type="list",
-        path_to_test_prop='["data"][41]["colorscale"]',
+        path_to_test_prop='["data"][2]["colorscale"]',
         take_snapshot=True,
     )
 
@@ -92,12 +92,12 @@ def test_dbcl003_row_col_thresholds(dash_duo):
         take_snapshot=True,
     )
 
-    # there should be 9 traces for the column dendrogram
+    # there should be one trace per column cluster (2)
     # plus one trace for the background
-    assert len(dash_duo.find_elements("g.subplot.x2y2 > g.plot g.trace.scatter")) == 10
+    assert len(dash_duo.find_elements("g.subplot.x2y2 > g.plot g.trace.scatter")) == 3
 
-    # 30 traces for the row dendrogram, plus one for the background
-    assert len(dash_duo.find_elements("g.subplot.x4y4 > g.plot g.trace.scatter")) == 31
+    # one trace per row cluster (3), plus one for the background
+    assert len(dash_duo.find_elements("g.subplot.x4y4 > g.plot g.trace.scatter")) == 4
 
 
 def test_dbcl004_col_annotations(dash_duo):
@@ -1,7 +1,13 @@
+import functools
+import types
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
+import scipy.cluster.hierarchy as sch
 
-from dash_bio import Clustergram
+from dash_bio import Clustergram, LinkageCache, DiskLinkageCache, \
+    clustergram_linkage, clustergram_heatmap_tile, update_clustergram_linkage
 
 DATA = np.array(
     [[1, 1, 1, 1],
@@ -83,3 +89,306 @@ def test_column_labels():
     clustered_data = CLUSTERED_DATA.T
 
     assert np.array_equal(curves_dict['heatmap']['z'], clustered_data)
+
+
+def test_linkage_cache(monkeypatch):
+    """Test that a cached clustering is reused and gives the same result."""
+
+    # the calls are counted by patching scipy, since a closure over them (or
+    # a global) would change the fingerprint of the linkage function
+    calls = []
+    linkage = sch.linkage
+
+    def counted_linkage(*args, **kwargs):
+        calls.append(1)
+        return linkage(*args, **kwargs)
+
+    monkeypatch.setattr(sch, 'linkage', counted_linkage)
+
+    def link_fun(x, **kwargs):
+        return sch.linkage(x, 'complete', **kwargs)
+
+    cache = LinkageCache()
+    kwargs = dict(
+        generate_curves_dict=True,
+        return_computed_traces=True,
+        center_values=False,
+        link_fun=link_fun,
+        linkage_cache=cache
+    )
+    _, _, first = Clustergram(DATA, **kwargs)
+    _, _, second = Clustergram(DATA, height=800, **kwargs)
+
+    assert len(calls) == 2
+    assert len(cache) == 1
+    assert np.array_equal(second['heatmap']['z'], CLUSTERED_DATA)
+    assert first['row_ids'] == second['row_ids']
+
+
+def test_linkage_cache_fingerprints():
+    """Test that linkage functions which only differ by their closure or
+    partial arguments are cached separately, and that callable objects
+    are not cached."""
+
+    data = np.random.RandomState(0).normal(size=(20, 4))
+
+    def make(method):
+        return lambda x, **kwargs: sch.linkage(x, method, **kwargs)
+
+    class Linkage:
+        def __call__(self, x, **kwargs):
+            return sch.linkage(x, 'single', **kwargs)
+
+    def row_ids(link_fun, **kwargs):
+        return Clustergram(
+            data, cluster='row', link_fun=link_fun,
+            return_computed_traces=True, **kwargs
+        )[1]['row_ids']
+
+    cache = LinkageCache()
+    for link_fun in [
+            make('single'), make('average'),
+            functools.partial(sch.linkage, method='single'),
+            functools.partial(sch.linkage, method='average'),
+    ]:
+        expected = row_ids(link_fun)
+        assert row_ids(link_fun, linkage_cache=cache) == expected
+    assert row_ids(make('single')) != row_ids(make('average'))
+    assert len(cache) == 4
+
+    row_ids(Linkage(), linkage_cache=cache)
+    assert len(cache) == 4
+
+
+# the linkage method of test_linkage_cache_globals
+LINK_METHOD = 'single'
+
+
+def _global_linkage(x, **kwargs):
+    return sch.linkage(x, LINK_METHOD, **kwargs)
+
+
+def test_linkage_cache_globals():
+    """Test that linkage functions which only differ by the value of a
+    global that they read are cached separately."""
+
+    data = np.random.RandomState(0).normal(size=(20, 4))
+
+    def row_ids(link_fun, **kwargs):
+        return Clustergram(
+            data, cluster='row', link_fun=link_fun,
+            return_computed_traces=True, **kwargs
+        )[1]['row_ids']
+
+    # the same code, reading 'single' and 'average' as LINK_METHOD
+    single = _global_linkage
+    average = types.FunctionType(
+        _global_linkage.__code__, dict(globals(), LINK_METHOD='average')
+    )
+
+    cache = LinkageCache()
+    assert row_ids(single, linkage_cache=cache) == row_ids(single)
+    assert row_ids(average, linkage_cache=cache) == row_ids(average)
+    assert row_ids(single) != row_ids(average)
+    assert len(cache) == 2
+
+
+def test_disk_linkage_cache(tmp_path):
+    """Test that the on-disk cache round-trips the linkage matrices."""
+
+    cache = DiskLinkageCache(str(tmp_path), max_entries=1)
+    Clustergram(DATA, linkage_cache=cache)
+    Clustergram(DATA.T, linkage_cache=cache)
+
+    assert len(cache) == 1
+    _, _, computed_traces = Clustergram(
+        DATA.T,
+        generate_curves_dict=True,
+        return_computed_traces=True,
+        center_values=False,
+        linkage_cache=cache
+    )
+    assert np.array_equal(computed_traces['heatmap']['z'], CLUSTERED_DATA.T)
+
+
+def test_precomputed_linkage():
+    """Test that precomputed linkage matrices give the same clustering."""
+
+    linkage = clustergram_linkage(DATA)
+    _, _, computed_traces = Clustergram(
+        DATA,
+        generate_curves_dict=True,
+        return_computed_traces=True,
+        center_values=False,
+        link_fun=None,
+        row_linkage=linkage['row_linkage'].tolist(),
+        col_linkage=linkage['col_linkage']
+    )
+
+    assert np.array_equal(computed_traces['heatmap']['z'], CLUSTERED_DATA)
+
+
+def test_dendrogram_traces_by_cluster():
+    """Test that the dendrogram links are grouped into one trace per cluster."""
+
+    _, _, computed_traces = Clustergram(
+        DATA,
+        generate_curves_dict=True,
+        return_computed_traces=True,
+        color_threshold={'row': 1.5, 'col': 0}
+    )
+    row_traces = computed_traces['dendro_traces']['row']
+    col_traces = computed_traces['dendro_traces']['col']
+
+    # background (root link) and the clusters of 1's and 3's
+    assert len(row_traces) == 3
+    assert len(col_traces) == 1
+    # 5 links, each made of 4 points separated by NaNs
+    assert sum(np.isnan(t['x']).sum() for t in row_traces) == 5 - 3
+    assert sum(np.count_nonzero(~np.isnan(t['x'])) for t in row_traces) == 5 * 4
+
+
+def test_row_bin_size():
+    """Test that binned row clustering keeps identical rows together."""
+
+    data = np.repeat(DATA, 10, axis=0)
+    _, _, computed_traces = Clustergram(
+        data,
+        generate_curves_dict=True,
+        return_computed_traces=True,
+        center_values=False,
+        row_bin_size=7
+    )
+
+    assert sorted(computed_traces['row_ids']) == list(range(60))
+    assert np.array_equal(
+        computed_traces['heatmap']['z'], np.repeat(CLUSTERED_DATA, 10, axis=0)
+    )
+
+
+def test_parallel_clustering():
+    """Test that parallel clustering gives the same result as serial."""
+
+    data = np.random.RandomState(0).rand(40, 30)
+    serial = clustergram_linkage(data)
+    threads = clustergram_linkage(data, n_jobs=2)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        processes = clustergram_linkage(data, executor=executor)
+
+    for linkage in [threads, processes]:
+        assert np.allclose(linkage['row_linkage'], serial['row_linkage'])
+        assert np.allclose(linkage['col_linkage'], serial['col_linkage'])
+
+
+def test_heatmap_aggregation():
+    """Test that the heatmap is aggregated and that tiles are at full
+    resolution when zoomed in."""
+
+    data = np.repeat(DATA, 100, axis=0)
+    _, _, computed_traces = Clustergram(
+        data,
+        generate_curves_dict=True,
+        return_computed_traces=True,
+        center_values=False,
+        heatmap_aggregation='mean',
+        height=60,
+        width=500
+    )
+    heatmap = computed_traces['heatmap']
+
+    assert np.shape(heatmap['z']) == (60, 4)
+    assert len(heatmap['y']) == 60
+    assert np.array_equal(
+        computed_traces['heat_data'], np.repeat(CLUSTERED_DATA, 100, axis=0)
+    )
+
+    tile = clustergram_heatmap_tile(
+        computed_traces,
+        {'yaxis5.range[0]': 2950, 'yaxis5.range[1]': 3150},
+        height=60
+    )
+    assert np.shape(tile['z']) == (20, 4)
+    assert np.array_equal(tile['y'], 10 * np.arange(295, 315) + 5)
+    assert np.array_equal(tile['z'][:, 0], [1] * 5 + [3] * 15)
+
+
+def test_update_linkage():
+    """Test that updating the clustering after filtering and appending rows
+    gives the same row clustering as clustering from scratch."""
+
+    data = np.random.RandomState(0).rand(30, 5)
+    row_mask = np.arange(30) % 3 != 0
+    appended_rows = np.random.RandomState(1).rand(4, 5)
+    new_data = np.vstack([data[row_mask], appended_rows])
+
+    linkage, distances = clustergram_linkage(data, return_distances=True)
+    new_linkage, new_distances = update_clustergram_linkage(
+        linkage,
+        distances,
+        data,
+        row_mask=row_mask,
+        appended_rows=appended_rows
+    )
+    expected = clustergram_linkage(new_data)
+
+    assert np.allclose(new_linkage['row_linkage'], expected['row_linkage'])
+    assert new_linkage['col_linkage'] is linkage['col_linkage']
+    assert new_distances['col'] is None
+
+    fig = Clustergram(new_data, **new_linkage)
+    assert len(fig.data) > 0
+
+
+def test_preprocessing_dtype():
+    """Test that the in-place preprocessing gives the same data in float32
+    as in float64, and imputes the missing values of each row."""
+
+    data = np.random.RandomState(0).rand(20, 6) + 0.5
+    data[3, 2] = np.nan
+    params = dict(
+        data=data,
+        imputer_parameters=dict(missing_values='nan', strategy='mean', axis=0),
+        log_transform=True,
+        standardize='row',
+        return_computed_traces=True
+    )
+
+    _, traces64 = Clustergram(**params)
+    _, traces32 = Clustergram(dtype='float32', **params)
+
+    z64 = np.asarray(traces64['heatmap']['z'])
+    z32 = np.asarray(traces32['heatmap']['z'])
+    assert z32.dtype == np.float32
+    assert not np.isnan(z64).any()
+    assert np.allclose(z64, z32, atol=1e-5)
+    # the input is not modified
+    assert np.isnan(data[3, 2])
+
+
+def test_preprocessing_dtype_values():
+    """Test the clustered and preprocessed data of a fixed input in float32
+    and in float64."""
+
+    data = np.array([[1, 2, 4], [4, 2, 1], [1, np.nan, 4], [8, 4, 2]])
+    # the rows of the log2 of the data (with the missing value imputed
+    # from the mean of its row, 2.5), standardized
+    clustered_data = np.array(
+        [[1.224745, 0, -1.224745],
+         [1.224745, 0, -1.224745],
+         [-1.224745, 0, 1.224745],
+         [-1.333336, 0.258427, 1.074909]]
+    )
+
+    for dtype in ['float32', 'float64']:
+        _, traces = Clustergram(
+            data=data,
+            dtype=dtype,
+            cluster='row',
+            imputer_parameters=dict(missing_values='nan', strategy='mean', axis=0),
+            log_transform=True,
+            standardize='row',
+            return_computed_traces=True
+        )
+
+        assert traces['row_ids'] == [1, 3, 0, 2]
+        assert np.allclose(traces['heatmap']['z'], clustered_data, atol=1e-5)
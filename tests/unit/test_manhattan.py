@@ -0,0 +1,343 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dash_bio import ManhattanPlot, MultiManhattanPlot, PreparedManhattanPlot, \
+    manhattan_plot_range, read_summary_stats
+from dash_bio.component_factory._manhattan import _ManhattanPlot
+
+DATA = pd.DataFrame({
+    'CHR': [2, 2, 2, 1, 1, 3, 3],
+    'BP': [10, 30, 20, 5, 15, 1, 2],
+    'P': [0.5, 1e-9, 0.1, 0.2, 1e-10, 0.3, 0.9],
+    'SNP': ['rs%i' % i for i in range(7)],
+    'GENE': ['G%i' % i for i in range(7)],
+})
+
+
+def test_layout():
+    """Test that the chromosomes are numbered in order of appearance and
+    shifted by the largest positions of the previous ones."""
+
+    mh = _ManhattanPlot(DATA)
+
+    assert list(mh.data['INDEX']) == [1, 1, 1, 2, 2, 3, 3]
+    assert list(mh.data['POSITION']) == [10, 30, 20, 35, 45, 46, 47]
+    assert mh.ticks == [21, 41, 47]
+    assert list(mh.ticksLabels) == [2, 1, 3]
+
+
+def test_hover_text():
+    """Test that each trace only gets the hover text of its own points."""
+
+    fig = ManhattanPlot(DATA)
+
+    assert [trace.name for trace in fig.data] == \
+        ['Point(s) of interest', 'Chr2', 'Chr1', 'Chr3']
+    assert np.allclose(fig.data[0].y, [9, 10])
+    assert list(fig.data[0].text) == \
+        ['SNP: rs1<br>GENE: G1', 'SNP: rs4<br>GENE: G4']
+    assert list(fig.data[1].text) == \
+        ['SNP: rs0<br>GENE: G0', 'SNP: rs2<br>GENE: G2']
+    assert len(fig.data[3].text) == 2
+
+
+def test_hover_customdata():
+    """Test that the hover information can be sent as custom data."""
+
+    fig = ManhattanPlot(DATA, hover_format='customdata')
+
+    assert fig.data[0].text is None
+    assert fig.data[1].hovertemplate == \
+        '(%{x}, %{y})<br>SNP: %{customdata[0]}<br>GENE: %{customdata[1]}'
+    assert [list(row) for row in fig.data[1].customdata] == \
+        [['rs0', 'G0'], ['rs2', 'G2']]
+
+
+def test_hover_missing():
+    """Test that a missing hover value is shown as 'nan'."""
+
+    data = DATA.assign(GENE=[None] + list(DATA['GENE'][1:]))
+
+    fig = ManhattanPlot(data)
+    assert list(fig.data[1].text) == \
+        ['SNP: rs0<br>GENE: nan', 'SNP: rs2<br>GENE: G2']
+
+    fig = ManhattanPlot(data, hover_format='customdata')
+    assert [row[0] for row in fig.data[1].customdata] == ['rs0', 'rs2']
+    assert pd.isna(fig.data[1].customdata[0][1])
+    assert fig.data[1].customdata[1][1] == 'G2'
+
+
+def test_hover_lazy():
+    """Test that with the lazy hover format, only the rows of the points
+    are sent, and their details are looked up on the server."""
+
+    prepared = PreparedManhattanPlot(DATA)
+    fig = ManhattanPlot(prepared, hover_format='lazy')
+
+    assert fig.data[1].text is None
+    assert list(fig.data[1].customdata) == [0, 2]
+    hover_data = {'points': [{'customdata': 2}, {'x': 1}]}
+    assert prepared.hover_details(hover_data) == [{'SNP': 'rs2', 'GENE': 'G2'}]
+    assert prepared.hover_details(None) == []
+
+
+def test_downsample():
+    """Test that the points below the threshold are thinned out, and that
+    the points above it are all kept."""
+
+    rs = np.random.RandomState(0)
+    n = 20000
+    data = pd.DataFrame({
+        'CHR': np.repeat([1, 2], n // 2),
+        'BP': np.tile(np.arange(n // 2), 2),
+        'P': rs.uniform(1e-6, 1, n),
+    })
+    data.loc[[5, 15000], 'P'] = 1e-12
+
+    for method in ['bins', 'random']:
+        fig = ManhattanPlot(
+            data, snp=None, gene=None, downsample=method,
+            downsample_threshold=4, downsample_resolution=[100, 50]
+        )
+        kept = sum(len(trace.x) for trace in fig.data)
+
+        assert fig.data[0].name == 'Point(s) of interest'
+        assert len(fig.data[0].x) == 2
+        assert kept + fig.layout.meta['downsampled_points'] == n
+        assert kept <= 2 * 100 * 50 + 2
+
+
+def test_single_trace():
+    """Test that all of the chromosomes can be drawn in a single trace,
+    with one legend entry per chromosome."""
+
+    fig = ManhattanPlot(DATA, single_trace=True)
+
+    assert [trace.name for trace in fig.data] == \
+        ['Point(s) of interest', '', 'Chr2', 'Chr1', 'Chr3']
+    assert list(fig.data[1].x) == [10, 20, 35, 46, 47]
+    assert list(fig.data[1].marker.color) == [0, 0, 1, 2, 2]
+    assert list(fig.data[1].text) == \
+        ['SNP: rs%i<br>GENE: G%i' % (i, i) for i in [0, 2, 3, 5, 6]]
+
+
+def test_single_trace_colors():
+    """Test that the chromosomes keep their colors in a single trace when
+    the ones before them are not plotted."""
+
+    col = ['red', 'green', 'blue']
+    x_range = [35, 47]
+    fig = ManhattanPlot(DATA, col=col, x_range=x_range)
+    single = ManhattanPlot(DATA, col=col, x_range=x_range, single_trace=True)
+
+    colors = {trace.name: trace.marker.color for trace in fig.data[1:]}
+    assert colors == {'Chr1': 'green', 'Chr3': 'blue'}
+    assert {trace.name: trace.marker.color for trace in single.data[2:]} == \
+        colors
+    scale = dict(single.data[1].marker.colorscale)
+    assert [scale[c / 2] for c in single.data[1].marker.color] == \
+        ['green', 'blue', 'blue']
+
+
+def test_read_summary_stats(tmp_path):
+    """Test that summary statistics are read in chunks in compact dtypes,
+    with the X and MT chromosomes numbered."""
+
+    path = str(tmp_path / 'stats.tsv.gz')
+    stats = pd.DataFrame({
+        'CHR': ['chr1', 'chr1', '2', 'X', 'MT', 'X'],
+        'BP': [10, 20, 5, 7, 3, 9],
+        'P': [0.5, 1e-300, 0.1, np.nan, 0.2, 0.3],
+        'SNP': ['rs%i' % i for i in range(6)],
+        'OTHER': range(6),
+    })
+    stats.to_csv(path, sep='\t', index=False)
+
+    data = read_summary_stats(path, chunksize=2)
+
+    assert list(data.columns) == ['CHR', 'BP', 'P', 'SNP']
+    assert list(data['CHR']) == [1, 1, 2, 25, 23]
+    assert data['CHR'].dtype == np.int8
+    assert data['BP'].dtype == np.int32
+    assert data['P'].dtype == np.float32
+    assert data['P'][1] > 0
+    assert data['SNP'].dtype == 'category'
+    assert list(data['SNP']) == ['rs0', 'rs1', 'rs2', 'rs4', 'rs5']
+
+    fig = ManhattanPlot(data, gene=None)
+    assert len(fig.data) == 5
+
+    stats['CHR'] = ['chr1', 'chrUn', '2', 'X', 'MT', 'X']
+    stats.to_csv(path, sep='\t', index=False)
+    data = read_summary_stats(path, chunksize=2, chromosome_map={'chrUn': 26})
+    assert list(data['CHR']) == [1, 26, 2, 25, 23]
+    assert list(data['SNP'].cat.categories) == \
+        ['rs0', 'rs1', 'rs2', 'rs4', 'rs5']
+
+    for rows in [stats.iloc[:0], stats.assign(P=np.nan)]:
+        rows.to_csv(path, sep='\t', index=False)
+        empty = read_summary_stats(path, chunksize=2)
+        assert len(empty) == 0
+        assert list(empty.dtypes.astype(str)) == \
+            ['int8', 'int32', 'float32', 'category']
+
+
+def test_x_range():
+    """Test that only the points in view are plotted, downsampled unless
+    there are few of them."""
+
+    rs = np.random.RandomState(0)
+    n = 20000
+    data = pd.DataFrame({
+        'CHR': np.repeat([1, 2], n // 2),
+        'BP': np.tile(np.arange(1, n // 2 + 1), 2),
+        'P': rs.uniform(1e-6, 1, n),
+    })
+
+    assert manhattan_plot_range({'xaxis.autorange': True}) is None
+    x_range = manhattan_plot_range(
+        {'xaxis.range[0]': 9990, 'xaxis.range[1]': 10100}
+    )
+    assert x_range == [9990, 10100]
+
+    fig = ManhattanPlot(
+        data, snp=None, gene=None, x_range=x_range, max_points=1000
+    )
+    x = np.concatenate([trace.x for trace in fig.data])
+    assert sorted(x) == list(range(9990, 10101))
+    assert list(fig.layout.xaxis.range) == x_range
+
+    fig = ManhattanPlot(
+        data, snp=None, gene=None, max_points=1000,
+        downsample_resolution=[20, 10]
+    )
+    assert sum(len(trace.x) for trace in fig.data) <= 2 * 20 * 10
+    assert fig.layout.meta['downsampled_points'] > 0
+
+
+def test_index():
+    """Test that the highlighted points are split from the other ones for
+    any index of the dataframe."""
+
+    data = DATA.set_index(pd.Index([10, 3, 7, 0, 1, 5, 2]))
+
+    fig = ManhattanPlot(data)
+
+    assert [list(trace.x) for trace in fig.data] == \
+        [[30, 45], [10, 20], [35], [46, 47]]
+
+
+def test_prepared():
+    """Test that a prepared plot gives the same figure as the dataframe,
+    also after pickling, and follows threshold changes."""
+
+    prepared = PreparedManhattanPlot(DATA)
+    prepared = pickle.loads(pickle.dumps(prepared))
+
+    for value in [5, 9.5]:
+        expected = ManhattanPlot(DATA, genomewideline_value=value)
+        fig = ManhattanPlot(prepared, genomewideline_value=value)
+        assert fig.to_json() == expected.to_json()
+
+
+def test_multi_manhattan_plot():
+    """Test that the studies share the positions along the genome, and that
+    the second study of a Miami plot is upside down."""
+
+    other = pd.DataFrame({
+        'CHR': [1, 3, 3],
+        'BP': [40, 1, 8],
+        'P': [0.1, 1e-9, 0.5],
+        'SNP': ['rs7', 'rs8', 'rs9'],
+        'GENE': ['G7', 'G8', 'G9'],
+    })
+
+    fig = MultiManhattanPlot(
+        [DATA, other], titles=['A', 'B'], miami=True, n_jobs=2
+    )
+
+    # chromosome 2 (up to 30), then 1 (up to 40), then 3
+    study = [trace for trace in fig.data if trace.xaxis == 'x2']
+    assert [list(trace.x) for trace in study] == [[71], [70], [78]]
+    assert [trace.showlegend for trace in study] == [False] * 3
+    # the chromosomes have the same color in both studies
+    assert study[1].marker.color == fig.data[2].marker.color == 'black'
+    assert list(fig.layout.xaxis2.tickvals) == [21, 53, 75]
+    assert fig.layout.yaxis2.autorange == 'reversed'
+    assert len(fig.layout.shapes) == 4
+
+
+def test_multi_manhattan_plot_range():
+    """Test that the x axis and the lines span the positions of all of the
+    studies, and not only those of the first one."""
+
+    other = pd.DataFrame({
+        'CHR': [1, 3, 3],
+        'BP': [40, 1, 150],
+        'P': [0.1, 1e-9, 0.5],
+    })
+
+    fig = MultiManhattanPlot([DATA, other], snp=None, gene=None)
+
+    # chromosome 2 (10 to 30), then 1 (up to 40), then 3 (up to 150)
+    assert max(max(trace.x) for trace in fig.data) == 220
+    assert list(fig.layout.xaxis.range) == [10, 220]
+    assert [(shape.x0, shape.x1) for shape in fig.layout.shapes] == \
+        [(10, 220)] * 4
+
+
+def test_density():
+    """Test that the points below the threshold are binned into a heatmap
+    of constant size."""
+
+    fig = ManhattanPlot(
+        DATA,
+        downsample='density',
+        downsample_threshold=8.5,
+        downsample_resolution=[40, 20],
+    )
+
+    assert fig.data[0].type == 'heatmap'
+    assert np.shape(fig.data[0].z) == (5, 10)
+    assert np.nansum(fig.data[0].z) == 5
+    assert fig.layout.meta['downsampled_points'] == 5
+    assert sum(len(trace.x) for trace in fig.data[1:]) == 2
+
+
+def test_density_without_points_below():
+    """Test that there is no heatmap when no finite value is below the
+    threshold (e.g., when there is no y range to bin)."""
+
+    for p in [[0.0] * 7, [1e-10] * 7]:
+        fig = ManhattanPlot(
+            DATA.assign(P=p), downsample='density', downsample_threshold=5
+        )
+
+        assert 'heatmap' not in [trace.type for trace in fig.data]
+        assert fig.layout.meta['downsampled_points'] == 0
+        assert sum(len(trace.x) for trace in fig.data) == 7
+
+
+def test_downsample_without_threshold():
+    """Test that False means no downsampling threshold (rather than 0),
+    and that other values than numbers are rejected."""
+
+    fig = ManhattanPlot(
+        DATA, downsample='density', downsample_threshold=False
+    )
+
+    # all of the points but the highlighted ones are binned
+    assert fig.data[0].type == 'heatmap'
+    assert np.nansum(fig.data[0].z) == 5
+    assert fig.layout.meta['downsampled_points'] == 5
+
+    fig = ManhattanPlot(DATA, downsample='density', downsample_threshold=0)
+    assert fig.layout.meta['downsampled_points'] == 0
+
+    for threshold in [True, '5']:
+        with pytest.raises(ValueError):
+            ManhattanPlot(DATA, downsample='bins', downsample_threshold=threshold)
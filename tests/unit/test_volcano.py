@@ -0,0 +1,164 @@
+import pickle
+
+import dash
+import numpy as np
+import pandas as pd
+import pytest
+
+from dash_bio import MultiVolcanoPlot, PreparedVolcanoPlot, VolcanoPlot
+
+DATA = pd.DataFrame(
+    {
+        'EFFECTSIZE': [2.0, -3.0, 0.5, 1.5, -0.2],
+        'P': [1e-10, 1e-12, 1e-9, 0.5, 0.1],
+        'SNP': ['rs%i' % i for i in range(5)],
+        'GENE': ['G%i' % i for i in range(5)],
+    },
+    index=[10, 3, 7, 0, 1]
+)
+
+
+def test_highlight():
+    """Test that the significant points are highlighted, and the other
+    ones plotted as the dataset, for any index of the dataframe."""
+
+    fig = VolcanoPlot(DATA)
+
+    assert [trace.name for trace in fig.data] == \
+        ['Point(s) of interest', 'Dataset']
+    assert list(fig.data[0].x) == [2.0, -3.0]
+    assert np.allclose(fig.data[0].y, [10, 12])
+    assert list(fig.data[0].text) == \
+        ['SNP: rs0<br>GENE: G0', 'SNP: rs1<br>GENE: G1']
+    assert list(fig.data[1].x) == [0.5, 1.5, -0.2]
+    assert list(fig.data[1].text) == \
+        ['SNP: rs%i<br>GENE: G%i' % (i, i) for i in [2, 3, 4]]
+
+
+def test_hover_missing():
+    """Test that a missing hover value is shown as 'nan'."""
+
+    data = DATA.assign(GENE=['G0', None, 'G2', np.nan, 'G4'])
+
+    fig = VolcanoPlot(data, highlight=False)
+    assert list(fig.data[0].text) == [
+        'SNP: rs0<br>GENE: G0', 'SNP: rs1<br>GENE: nan',
+        'SNP: rs2<br>GENE: G2', 'SNP: rs3<br>GENE: nan',
+        'SNP: rs4<br>GENE: G4',
+    ]
+
+    fig = VolcanoPlot(data, highlight=False, hover_format='customdata')
+    genes = [row[1] for row in fig.data[0].customdata]
+    assert [pd.isna(gene) for gene in genes] == \
+        [False, True, False, True, False]
+    assert genes[2] == 'G2'
+
+
+def test_density():
+    """Test that the points that are not past any of the lines are binned
+    into a heatmap, and that the other ones are still markers."""
+
+    fig = VolcanoPlot(DATA, density=True, density_resolution=[40, 20])
+
+    assert [trace.name for trace in fig.data] == \
+        ['Density', 'Point(s) of interest', 'Dataset']
+    assert np.shape(fig.data[0].z) == (5, 10)
+    assert np.nansum(fig.data[0].z) == 1
+    assert fig.layout.meta['downsampled_points'] == 1
+    # past the genome-wide line, or past the effect size lines
+    assert list(fig.data[2].x) == [0.5, 1.5]
+
+
+def test_density_without_points_below():
+    """Test that the density heatmap is empty, rather than failing, when no
+    finite point is below the genome-wide line."""
+
+    for p in [0.0, 1e-12]:
+        data = pd.DataFrame({'EFFECTSIZE': [1.0, 2.0, 3.0], 'P': [p] * 3})
+        fig = VolcanoPlot(data, snp=None, gene=None, density=True)
+
+        assert fig.data[0].type == 'heatmap'
+        assert np.isnan(np.array(fig.data[0].z, dtype=float)).all()
+        assert fig.layout.meta['downsampled_points'] == 0
+        assert set(fig.data[1].x) | set(fig.data[2].x) == {1.0, 2.0, 3.0}
+
+
+def test_prepared():
+    """Test that a new threshold only updates the highlighted points and
+    the lines of the figure of a prepared plot."""
+
+    prepared = pickle.loads(pickle.dumps(PreparedVolcanoPlot(DATA)))
+    fig = VolcanoPlot(prepared)
+
+    assert [trace.name for trace in fig.data] == \
+        ['Dataset', 'Point(s) of interest']
+    assert len(fig.data[0].x) == 5
+    assert list(fig.data[1].x) == [2.0, -3.0]
+
+    operations = prepared.threshold_patch(
+        effect_size_line=[-0.1, 0.1], genomewideline_value=8
+    ).to_plotly_json()['operations']
+    values = {
+        tuple(operation['location']): operation['params']['value']
+        for operation in operations
+    }
+
+    assert sorted(values) == [
+        ('data', 1, 'text'), ('data', 1, 'x'), ('data', 1, 'y'),
+        ('layout', 'shapes')
+    ]
+    assert list(values['data', 1, 'x']) == [2.0, -3.0, 0.5]
+    assert [shape['x0'] for shape in values['layout', 'shapes'][:2]] == \
+        [-0.1, 0.1]
+
+
+def test_prepared_traces():
+    """Test that the figure of a prepared plot has the same points and
+    lines as the figure of the dataframe, with the 'Dataset' trace first
+    and with all of the points."""
+
+    fig = VolcanoPlot(DATA)
+    prepared = VolcanoPlot(PreparedVolcanoPlot(DATA))
+
+    assert [trace.name for trace in fig.data] == \
+        ['Point(s) of interest', 'Dataset']
+    assert [trace.name for trace in prepared.data] == \
+        ['Dataset', 'Point(s) of interest']
+    assert list(prepared.data[1].x) == list(fig.data[0].x)
+    assert sorted(prepared.data[0].x) == \
+        sorted(list(fig.data[0].x) + list(fig.data[1].x))
+    assert prepared.layout.shapes == fig.layout.shapes
+
+
+def test_prepared_old_dash(monkeypatch):
+    """Test that threshold_patch explains that it needs a newer dash."""
+
+    monkeypatch.delattr(dash, 'Patch')
+    with pytest.raises(ImportError, match='dash>=2.9'):
+        PreparedVolcanoPlot(DATA).threshold_patch()
+
+
+def test_multi_volcano_plot():
+    """Test that there is one panel per contrast, with the hover values
+    of the genes in custom data, and the lines in each panel."""
+
+    data = pd.concat([DATA.assign(CONTRAST=c) for c in ['B', 'A', 'C']])
+    data.loc[data['CONTRAST'] == 'A', 'P'] = 0.5
+
+    fig = MultiVolcanoPlot(data, columns=2)
+
+    assert [a.text for a in fig.layout.annotations] == ['B', 'A', 'C']
+    assert [(trace.name, trace.xaxis) for trace in fig.data] == [
+        ('Point(s) of interest', 'x'), ('Dataset', 'x'),
+        ('Point(s) of interest', 'x2'), ('Dataset', 'x2'),
+        ('Point(s) of interest', 'x3'), ('Dataset', 'x3'),
+    ]
+    assert list(fig.data[0].x) == [2.0, -3.0]
+    assert len(fig.data[2].x) == 0
+    assert fig.data[3].text is None
+    assert list(fig.data[3].customdata) == ['G%i' % i for i in range(5)]
+    assert fig.data[3].hovertemplate == '(%{x}, %{y})<br>GENE: %{customdata}'
+    assert [trace.showlegend for trace in fig.data] == [True] * 2 + [False] * 4
+    assert len(fig.layout.shapes) == 9
+    assert fig.layout.xaxis3.title.text == 'Effect Size'
+    assert fig.layout.yaxis3.title.text == '-log10(p)'